@@ -1,7 +1,19 @@
+import os
+import sys
+from functools import partial
+
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.special import erfc
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from digcom.adaptive import adaptive_sweep
+from digcom.cache import ResultCache
+from digcom.channel import AWGNChannel
+from digcom.importance import BiasedAWGNChannel, ber_curve_is, pam_is_trial
+from digcom.pam import pam_symbol_error_probability, pam_trial
+from digcom.pulse import PulseShaper
+
 # Add Raised Cosine pulse shaping to PAM BER simulation
 # اضافه کردن شکل‌دهی پالس Raised Cosine به شبیه‌سازی احتمال خطا برای PAM.
 
@@ -22,8 +34,19 @@ T_symbol = 1 / RB  # مدت زمان هر نماد
 # Duration of each symbol
 fs = 10 * RB  # نرخ نمونه‌برداری
 # Sampling rate
-num_symbols = 10000  # تعداد نمادها برای شبیه‌سازی
-# Number of symbols for simulation
+num_symbols = 10000  # تعداد نمادها در هر بخش شبیه‌سازی
+# Number of symbols simulated per chunk
+target_errors = 200  # تعداد خطای هدف برای هر نقطه SNR
+# Each SNR point stops after this many errors...
+max_symbols = 10**7  # بیشینه تعداد نمادها برای هر نقطه SNR
+# ...or once this many symbols have been simulated
+seed = 0  # بذر تولید اعداد تصادفی (نتایج تکرارپذیر و قابل ذخیره)
+# Sweep seed; results are bit-for-bit reproducible on any number of cores and can be cached
+cache = ResultCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ber_cache'))
+# حافظه نهان نتایج روی دیسک: نقاط SNR تکراری دوباره شبیه‌سازی نمی‌شوند
+# On-disk result cache: SNR points already simulated with the same configuration are reused
+precision = 'single'  # دقت محاسبات کانال ('single' یا 'double')
+# Channel precision: 'single' keeps the whole link in float32
 
 # پارامترهای پالس Raised Cosine
 # Raised Cosine pulse parameters
@@ -32,30 +55,15 @@ roll_off = 0.25  # ضریب رول‌آف
 span = 4  # تعداد نمادهای اثرگذار
 # Number of symbol durations covered by the pulse
 
-# تولید پالس Raised Cosine
-# Generate Raised Cosine pulse
-def raised_cosine_pulse(roll_off, span, T_symbol, fs):
-    t = np.linspace(-span*T_symbol, span*T_symbol, int(2*span*T_symbol*fs))  # زمان
-    # Time range for pulse generation
-    h = np.sinc(t / T_symbol) * np.cos(np.pi * roll_off * t / T_symbol) / (1 - (2 * roll_off * t / T_symbol) ** 2)  # پالس
-    # Raised Cosine pulse formula
-    h[np.isnan(h)] = 0  # رفع NaN‌های احتمالی
-    # Handle NaN values (if denominator becomes zero)
-    return h / np.max(np.abs(h))  # نرمال‌سازی به دامنه واحد
-    # Normalize pulse to unit amplitude
-
-# تولید داده‌های تصادفی
-# Generate random data
-bits = np.random.choice([0, 1], size=num_symbols)
-# Generate random bits (0 or 1)
-symbols = 2*bits - 1  # تبدیل بیت‌ها به -1 و +1
-# Map bits to PAM symbols (-1 and +1)
+# فیلتر فرستنده Root Raised Cosine و فیلتر منطبق گیرنده
+# Root Raised Cosine transmit filter and matched receive filter: the symbols are
+# upsampled by fs/RB, shaped with a polyphase (upfirdn) filter, matched filtered
+# and sampled once per symbol. The filter taps are cached per parameter set.
+shaper = PulseShaper(roll_off, span, T_symbol, fs)
 
-# اعمال پالس Raised Cosine به داده‌های PAM
-# Apply Raised Cosine pulse shaping to PAM data
-pulse = raised_cosine_pulse(roll_off, span, T_symbol, fs)
-signal = np.convolve(symbols, pulse, mode='same')  
-# Convolve symbols with Raised Cosine pulse
+# کانال AWGN با واریانس نویز 1/(2*SNR) و بافرهای قابل استفاده مجدد
+# AWGN channel with noise variance 1/(2*SNR), adding noise in place from reused buffers
+channel = AWGNChannel(signal_power=1, precision=precision)
 
 # دامنه SNR (دسی‌بل)
 # SNR range in dB
@@ -74,27 +82,31 @@ BER_theoretical = Q(np.sqrt(SNR_linear))
 
 # شبیه‌سازی BER
 # Simulate BER
-BER_simulated = []
+# هر نقطه SNR به صورت بخش‌به‌بخش شبیه‌سازی می‌شود تا به تعداد خطای هدف برسد.
+# Each SNR point runs in chunks of num_symbols until target_errors is reached;
+# missing points are spread across all CPU cores and cached points are reused.
+# شبکه SNR تطبیقی: از هر 2 دسی‌بل شروع و فقط در خمیدگی منحنی یا انحراف از تئوری ریزتر می‌شود
+# Adaptive SNR grid: start every 2 dB, bisect only where the curve bends or leaves the theory,
+# and stop at the first point below the BER floor. The reference is the exact error rate of the
+# simulated link (noise variance 1/(2*SNR) per dimension), not the Q(sqrt(SNR)) line plotted below.
+config = dict(M=2, A=A, RB=RB, fs=fs, roll_off=roll_off, span=span, filter=shaper.method, precision=precision)
+BER_points = adaptive_sweep(partial(pam_trial, M=2, A=A, shaper=shaper, channel=channel), SNR_dB_range[::2],
+                            ber_floor=1e-6, theory=partial(pam_symbol_error_probability, M=2, A=A), seed=seed,
+                            cache=cache, config=config, target_errors=target_errors, max_symbols=max_symbols,
+                            chunk_size=num_symbols)
+SNR_dB_simulated = np.array([point.snr_db for point in BER_points])
+BER_simulated = np.array([point.ber for point in BER_points])
+# بازه اطمینان ۹۵٪ برای هر نقطه
+# 95% confidence interval of every point
+BER_interval = np.array([point.confidence_interval(0.95) for point in BER_points]).T
 
-# شبیه‌سازی برای مقادیر مختلف SNR
-# Simulation for different SNR values
-for SNR_dB in SNR_dB_range:
-    # تولید نویز گوسی با واریانس مناسب
-    # Generate Gaussian noise with appropriate variance
-    noise = np.random.normal(0, np.sqrt(1 / (2 * 10**(SNR_dB / 10))), size=signal.shape)
-    
-    # سیگنال دریافتی
-    # Received signal
-    received_signal = signal + noise
-    
-    # آشکارسازی و مقایسه با صفر
-    # Detection and comparison with zero
-    detected_symbols = np.sign(received_signal)
-    
-    # محاسبه احتمال خطا
-    # Calculate error probability
-    num_errors = np.sum(detected_symbols != symbols)
-    BER_simulated.append(num_errors / num_symbols)
+# نمونه‌برداری اهمیت: نویز به سمت آستانه تصمیم منحرف و هر خطا با نسبت درست‌نمایی وزن‌دهی می‌شود
+# Importance sampling for the high-SNR points, where the plain simulation runs out of errors:
+# the noise is biased towards the decision threshold and every error is weighted by the
+# likelihood ratio, so a few thousand symbols resolve BER far below 1e-8 (with its variance).
+BER_IS_points = ber_curve_is(partial(pam_is_trial, M=2, A=A, channel=BiasedAWGNChannel(signal_power=1)),
+                             SNR_dB_range, rng=seed, chunk_size=num_symbols)
+BER_importance = np.array([point.ber for point in BER_IS_points])
 
 # رسم منحنی BER
 # Plot BER curves
@@ -102,7 +114,9 @@ plt.figure(figsize=(8, 6))
 plt.semilogy(SNR_dB_range, BER_theoretical, label="Theoretical BER", marker='o')
 # رسم BER نظری
 # Plot theoretical BER
-plt.semilogy(SNR_dB_range, BER_simulated, label="Simulated BER", marker='x')
+plt.semilogy(SNR_dB_simulated, BER_simulated, label="Simulated BER", marker='x')
+plt.fill_between(SNR_dB_simulated, BER_interval[0], BER_interval[1], alpha=0.2, label="95% confidence interval")
+plt.semilogy(SNR_dB_range, BER_importance, label="Importance-sampled BER", marker='.')
 # رسم BER شبیه‌سازی شده
 # Plot simulated BER
 plt.title("BER vs SNR for PAM with Raised Cosine Pulse (Theoretical vs Simulated)")
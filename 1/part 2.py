@@ -1,7 +1,18 @@
+import os
+import sys
+from functools import partial
+
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.special import erfc
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from digcom.adaptive import adaptive_sweep
+from digcom.cache import ResultCache
+from digcom.channel import AWGNChannel
+from digcom.pam import pam_symbol_error_probability, pam_trial
+from digcom.pulse import PulseShaper
+
 # تابع Q-function
 def Q(x):
     return 0.5 * erfc(x / np.sqrt(2))
@@ -11,55 +22,39 @@ A = 1  # دامنه پایه سیگنال PAM
 RB = 1e3  # نرخ داده (تعداد نمادها در ثانیه)
 T_symbol = 1 / RB  # مدت زمان هر نماد
 fs = 10 * RB  # نرخ نمونه‌برداری
-num_symbols = 10000  # تعداد نمادها برای شبیه‌سازی
+num_symbols = 10000  # تعداد نمادها در هر بخش شبیه‌سازی
+target_errors = 200  # تعداد خطای هدف برای هر نقطه SNR
+max_symbols = 10**7  # بیشینه تعداد نمادها برای هر نقطه SNR
+seed = 0  # بذر تولید اعداد تصادفی (نتایج تکرارپذیر و قابل ذخیره)
+cache = ResultCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ber_cache'))  # حافظه نهان نتایج روی دیسک
+precision = 'single'  # دقت محاسبات کانال ('single' یا 'double')
 
 # پارامترهای پالس Raised Cosine
 roll_off = 0.25  # ضریب رول‌آف
 span = 4  # تعداد نمادهای اثرگذار
 
-# تولید پالس Raised Cosine
-def raised_cosine_pulse(roll_off, span, T_symbol, fs):
-    t = np.linspace(-span * T_symbol, span * T_symbol, int(2 * span * T_symbol * fs))
-    h = np.sinc(t / T_symbol) * np.cos(np.pi * roll_off * t / T_symbol) / (1 - (2 * roll_off * t / T_symbol) ** 2)
-    h[np.isnan(h)] = 0
-    return h / np.max(np.abs(h))
-
-# تولید داده‌های تصادفی برای 4-PAM
-bits = np.random.choice([0, 1, 2, 3], size=num_symbols)
-symbols = A * (2 * bits - 3)  # تبدیل بیت‌ها به مقادیر 4-PAM: A3-, A-, A, A3
+# فیلتر فرستنده Root Raised Cosine و فیلتر منطبق گیرنده (با نمونه‌برداری در نرخ fs)
+shaper = PulseShaper(roll_off, span, T_symbol, fs)
 
-# اعمال پالس Raised Cosine به داده‌های PAM
-pulse = raised_cosine_pulse(roll_off, span, T_symbol, fs)
-signal = np.convolve(symbols, pulse, mode='same')
+# کانال AWGN با واریانس نویز 1/(2*SNR)
+channel = AWGNChannel(signal_power=1, precision=precision)
 
 # دامنه SNR (دسی‌بل)
 SNR_dB_range = np.arange(0, 20, 1)
 SNR_linear = 10**(SNR_dB_range / 10)
 
-# شبیه‌سازی BER
-BER_simulated = []
-
-# مقادیر آستانه برای آشکارسازی 4-PAM
-thresholds = np.array([-2 * A, 0, 2 * A])
-
-# شبیه‌سازی برای مقادیر مختلف SNR
-for SNR_dB in SNR_dB_range:
-    # تولید نویز گوسی با واریانس مناسب
-    noise = np.random.normal(0, np.sqrt(1 / (2 * 10**(SNR_dB / 10))), size=signal.shape)
-    
-    # سیگنال دریافتی
-    received_signal = signal + noise
-    
-    # آشکارسازی
-    detected_symbols = np.zeros(received_signal.shape)
-    detected_symbols[received_signal < thresholds[0]] = -3 * A  # A3-
-    detected_symbols[(received_signal >= thresholds[0]) & (received_signal < thresholds[1])] = -A  # A-
-    detected_symbols[(received_signal >= thresholds[1]) & (received_signal < thresholds[2])] = A  # A
-    detected_symbols[received_signal >= thresholds[2]] = 3 * A  # A3
-    
-    # محاسبه احتمال خطا
-    num_errors = np.sum(detected_symbols != symbols)
-    BER_simulated.append(num_errors / num_symbols)
+# شبیه‌سازی BER به صورت بخش‌به‌بخش تا رسیدن به تعداد خطای هدف
+# سطوح 4-PAM: A3-, A-, A, A3 و آشکارسازی با آستانه‌های A2-, 0, A2
+# شبکه SNR تطبیقی: شروع با گام 2 دسی‌بل، ریز شدن فقط در خمیدگی منحنی یا انحراف از احتمال خطای دقیق
+# همین لینک (واریانس نویز 1/(2*SNR))، و توقف در اولین نقطه با BER کمتر از 1e-6
+config = dict(M=4, A=A, RB=RB, fs=fs, roll_off=roll_off, span=span, filter=shaper.method, precision=precision)
+BER_points = adaptive_sweep(partial(pam_trial, M=4, A=A, shaper=shaper, channel=channel), SNR_dB_range[::2],
+                            ber_floor=1e-6, theory=partial(pam_symbol_error_probability, M=4, A=A), seed=seed,
+                            cache=cache, config=config, target_errors=target_errors, max_symbols=max_symbols,
+                            chunk_size=num_symbols)
+SNR_dB_simulated = np.array([point.snr_db for point in BER_points])
+BER_simulated = np.array([point.ber for point in BER_points])
+BER_interval = np.array([point.confidence_interval(0.95) for point in BER_points]).T
 
 # محاسبه احتمال خطای نظری (BER)
 BER_theoretical = (3 / 2) * Q(np.sqrt(SNR_linear / 5))
@@ -67,7 +62,8 @@ BER_theoretical = (3 / 2) * Q(np.sqrt(SNR_linear / 5))
 # رسم منحنی BER
 plt.figure(figsize=(8, 6))
 plt.semilogy(SNR_dB_range, BER_theoretical, label="Theoretical BER (4-PAM)", marker='o')
-plt.semilogy(SNR_dB_range, BER_simulated, label="Simulated BER (4-PAM)", marker='x')
+plt.semilogy(SNR_dB_simulated, BER_simulated, label="Simulated BER (4-PAM)", marker='x')
+plt.fill_between(SNR_dB_simulated, BER_interval[0], BER_interval[1], alpha=0.2)
 plt.title("BER vs SNR for 4-PAM with Raised Cosine Pulse (Theoretical vs Simulated)")
 plt.xlabel("SNR (dB)")
 plt.ylabel("BER")
@@ -1,40 +1,33 @@
+import os  # Import os for path handling
+import sys  # Import sys to extend the module search path
+import tempfile  # Temporary directory for the IQ capture file
+from functools import partial  # Bind keyword arguments of the trial function
+
 import numpy as np  # Import numpy for numerical operations
 import matplotlib.pyplot as plt  # Import matplotlib for plotting graphs
-from scipy.signal import convolve  # Import convolve function from scipy for signal processing (not used in this code)
-from scipy.stats import norm  # Import norm function from scipy.stats (not used in this code)
-
-# Function to add AWGN (Additive White Gaussian Noise) noise to a signal
-def add_awgn_noise(signal, SNR_dB):
-    """
-    Adds Gaussian noise to the signal based on the specified SNR (Signal-to-Noise Ratio).
-    
-    Parameters:
-    - signal: The original signal to which noise will be added.
-    - SNR_dB: The desired Signal-to-Noise Ratio in decibels (dB).
-    
-    Returns:
-    - signal with added AWGN noise.
-    """
-    # Convert SNR from dB to linear scale
-    SNR_linear = 10**(SNR_dB / 10)  # Linear SNR
-    # Calculate signal power (mean squared value of the signal)
-    signal_power = np.mean(np.abs(signal)**2)
-    # Calculate noise power based on SNR
-    noise_power = signal_power / SNR_linear
-    # Generate complex noise with Gaussian distribution (real and imaginary parts)
-    noise = np.sqrt(noise_power / 2) * (np.random.randn(len(signal)) + 1j * np.random.randn(len(signal)))
-    # Return the signal with added noise
-    return signal + noise
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Make the shared digcom package importable
+from digcom.capture import CaptureWriter, IQCapture  # Memory-mapped IQ capture files
+from digcom.channel import AWGNChannel  # AWGN channel with reused noise buffers
+from digcom.fused import qam16_fused_trial  # Noise, slicing and error count in one cache-blocked pass
+from digcom.adaptive import adaptive_sweep  # SNR grid refined where the BER curve needs it
+from digcom.qam import (add_awgn_noise, demodulate_16qam, demodulate_16qam_chunks, modulate_16qam,  # 16-QAM link shared
+                        qam16_symbol_error_probability)  # with the sweep engine, and its exact error rate
 
 # Parameters for the simulation
 num_symbols = 1000  # Number of symbols to generate for the communication system
-SNR_values = np.arange(0, 21, 2)  # SNR values from 0 to 20 dB in steps of 2
+SNR_values = np.arange(0, 21, 4)  # Coarse SNR grid from 0 to 20 dB, refined where the BER curve bends
+ber_floor = 1e-6  # No SNR point is simulated beyond the first one below this error rate
+seed = None  # Seed of the sweep; set an integer to get bit-for-bit reproducible curves on any worker count
+precision = 'single'  # Channel precision of the sweep: 'single' (complex64) or 'double' (complex128)
+capture_symbols = 10**7  # Number of noisy symbols recorded to the IQ capture file (80 MB of complex64 samples)
+capture_chunk = 2**20  # Symbols generated / demodulated per chunk of the capture
 
 # 1. Generate random symbols (from 0 to 15 for 16-QAM modulation)
 symbols = np.random.randint(0, 16, num_symbols)  # Generates 1000 random symbols between 0 and 15
 
 # 2. 16-QAM modulation: Mapping symbols to complex plane
-modulated = ((2 * (symbols % 4) - 3) + 1j * (2 * (symbols // 4) - 3)) / np.sqrt(10)
+modulated = modulate_16qam(symbols)
 # Explanation: 
 # - 'symbols % 4' gives values between 0 and 3 (used for the real part).
 # - 'symbols // 4' gives values between 0 and 3 (used for the imaginary part).
@@ -100,22 +93,6 @@ plt.grid()  # Add grid
 plt.tight_layout()  # Adjust the layout to prevent overlapping subplots
 
 # 4. Demodulation and error calculation
-def demodulate_16qam(received):
-    """
-    Demodulates a received signal based on 16-QAM modulation scheme.
-    
-    Parameters:
-    - received: The received noisy signal (complex).
-    
-    Returns:
-    - Demodulated symbol indices.
-    """
-    # Quantize the real and imaginary parts to the closest valid constellation point
-    real_part = np.clip(np.round((received.real * np.sqrt(10) + 3) / 2), 0, 3)  # Quantize real part
-    imag_part = np.clip(np.round((received.imag * np.sqrt(10) + 3) / 2), 0, 3)  # Quantize imaginary part
-    # Reconstruct the symbol by combining real and imaginary parts
-    return (real_part + 4 * imag_part).astype(int)  # Mapping back to symbol index
-
 # Demodulate the noisy signal and calculate bit errors
 demodulated = demodulate_16qam(noisy_signal)  # Demodulate the noisy signal
 num_errors = np.sum(symbols != demodulated)  # Count the number of errors (mismatches)
@@ -125,19 +102,42 @@ error_rate = num_errors / num_symbols  # Calculate the error rate
 print(f"Number of errors at SNR = {SNR} dB: {num_errors}")
 print(f"Error rate at SNR = {SNR} dB: {error_rate}")
 
-# 5. Error rate analysis for different SNR values
-ber = []  # List to store the Bit Error Rate (BER) for different SNR values
+# Record a long noisy 16-QAM stream to an IQ capture file, chunk by chunk, and demodulate it
+# offline: the file is memory-mapped and every chunk is a view of it, so memory stays bounded.
+# The file goes to a temporary directory that is removed once the capture has been demodulated.
+rng = np.random.default_rng(0)  # Generator of the recorded symbols and noise
+capture_channel = AWGNChannel(signal_power=1, precision='single')  # complex64, the sample type of the file
+capture_sent = np.empty(capture_symbols, dtype=np.uint8)  # Transmitted symbols, one byte each, to count the errors
+capture_errors = 0
+with tempfile.TemporaryDirectory() as capture_dir:
+    capture_path = os.path.join(capture_dir, 'qam16_capture.iq')  # Recorded received stream
+    with CaptureWriter(capture_path, dict(modulation='16qam', SNR_dB=SNR)) as writer:
+        for start in range(0, capture_symbols, capture_chunk):
+            chunk_symbols = rng.integers(0, 16, min(capture_chunk, capture_symbols - start))
+            capture_sent[start:start + len(chunk_symbols)] = chunk_symbols
+            writer.write(capture_channel.add_noise(capture_channel.cast(modulate_16qam(chunk_symbols)), SNR, rng))
+    with IQCapture(capture_path) as capture:
+        for start, demodulated_chunk in zip(range(0, len(capture), capture_chunk),
+                                            demodulate_16qam_chunks(capture.samples, capture_chunk)):
+            capture_errors += np.count_nonzero(capture_sent[start:start + capture_chunk] != demodulated_chunk)
+print(f"Error rate of the {capture_symbols} recorded symbols at SNR = {SNR} dB: {capture_errors / capture_symbols}")
 
-# Loop over different SNR values and calculate the error rate for each
-for snr in SNR_values:
-    noisy_signal = add_awgn_noise(modulated, snr)  # Add noise to the modulated signal
-    demodulated = demodulate_16qam(noisy_signal)  # Demodulate the noisy signal
-    num_errors = np.sum(symbols != demodulated)  # Count the number of errors
-    ber.append(num_errors / num_symbols)  # Store the error rate for the current SNR
+# 5. Error rate analysis for different SNR values
+# Adaptive sweep: the coarse grid runs one SNR point per CPU core at a time and stops after the first
+# point below ber_floor; intervals where log10(BER) bends or leaves the exact 16-QAM symbol error rate are
+# then bisected, each batch of new points in parallel. Every point uses a generator derived from (seed, SNR).
+# The fused trial adds noise, slices and counts errors block by block, with per-block temporaries only
+# (compiled with numba when it is installed), so chunks can be much longer than num_symbols.
+channel = AWGNChannel(signal_power=1, precision=precision)  # Unit-power constellation, in-place noise
+points = adaptive_sweep(partial(qam16_fused_trial, channel=channel), SNR_values, ber_floor=ber_floor,
+                        theory=qam16_symbol_error_probability, seed=seed, target_errors=100, max_symbols=10**6,
+                        chunk_size=100 * num_symbols)
+snr = [point.snr_db for point in points]  # Simulated SNR values, coarse and refined
+ber = [point.ber for point in points]  # Error rate for every SNR value
 
 # 6. Plot error probability curve vs SNR
 plt.figure()  # Create a new figure for plotting the BER vs SNR
-plt.semilogy(SNR_values, ber, 'o-', linewidth=2)  # Plot BER on logarithmic scale (y-axis) vs SNR
+plt.semilogy(snr, ber, 'o-', linewidth=2)  # Plot BER on logarithmic scale (y-axis) vs SNR
 plt.xlabel("SNR (dB)")  # Label for the x-axis
 plt.ylabel("Bit Error Rate (BER)")  # Label for the y-axis
 plt.title("BER vs SNR for 16-QAM")  # Title for the plot
@@ -1,7 +1,16 @@
+import os
+import sys
+import tempfile
+
 import numpy as np
 from scipy.fft import ifft, fft
-from scipy.stats import norm
-from sklearn.preprocessing import binarize 
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from digcom.bitstream import PackedBits, popcount
+from digcom.capture import CaptureWriter, IQCapture
+from digcom.channel import AWGNChannel
+from digcom.mapping import SymbolMapper
+from digcom.ofdm import OFDMEngine
 
 # Define parameters
 numSubcarriers = 64  # Number of subcarriers in the OFDM system
@@ -9,22 +18,26 @@ numSymbols = 1000    # Number of OFDM symbols to be transmitted
 modOrder = 4         # Modulation order (e.g., 4 for QPSK, 16 for 16-QAM)
 cpLength = 16        # Length of the cyclic prefix to mitigate ISI (Inter-Symbol Interference)
 SNR_dB = 10          # Signal-to-Noise Ratio (SNR) in dB
+SNR_range = np.arange(0, 21, 2)  # SNR values (dB) of the BER-vs-SNR curve
+captureSymbols = 100000  # OFDM symbols recorded to the IQ capture file (64 MB of complex64 samples)
+
+# Bit/symbol mapper with precomputed lookup tables for the PSK constellation
+mapper = SymbolMapper(modOrder, kind='psk')
 
 # Calculate bits per symbol
-bitsPerSymbol = int(np.log2(modOrder))  # Number of bits per symbol (e.g., 2 bits for QPSK)
+bitsPerSymbol = mapper.bitsPerSymbol  # Number of bits per symbol (e.g., 2 bits for QPSK)
 
 # Generate random bitstream for data transmission
-dataBits = np.random.randint(0, 2, numSymbols * numSubcarriers * bitsPerSymbol)  # Random binary data
+# The bits are drawn and kept packed (8 bits per byte) instead of one integer per bit
+dataBits = PackedBits.random(numSymbols * numSubcarriers * bitsPerSymbol)  # Random binary data
 
 # Map bits to QAM symbols
-# Reshape the bitstream into groups of bits that represent each symbol
-dataSymbols = dataBits.reshape(-1, bitsPerSymbol)
-# Convert each group of bits into a decimal number representing the symbol
-symbols = np.dot(dataSymbols, 2**np.arange(bitsPerSymbol)[::-1])
+# Group the bitstream (MSB first) into the decimal number representing each symbol
+symbols = mapper.packed_to_labels(dataBits)
 
 # Modulate the data using QAM (QPSK in this case)
-# Create complex QAM symbols by modulating the symbol indices
-modulatedData = np.exp(1j * (2 * np.pi * symbols / modOrder))
+# Look up the complex constellation point of every symbol index
+modulatedData = mapper.label_points[symbols]
 
 # Reshape the modulated data into OFDM symbols
 # Each column represents an OFDM symbol (with numSubcarriers subcarriers)
@@ -62,17 +75,51 @@ estimatedSymbols = np.round((np.angle(rxSymbolsFlattened) * modOrder) / (2 * np.
 # Adjust negative symbol indices to be positive, as QAM symbols are cyclic
 estimatedSymbols[estimatedSymbols < 0] = estimatedSymbols[estimatedSymbols < 0] + modOrder
 
-# Map the estimated symbols back to bits
-receivedBits = np.array([list(np.binary_repr(int(symbol), width=bitsPerSymbol)) for symbol in estimatedSymbols])
-# Flatten the list of binary representations and convert it to an array of bits
-receivedBits = receivedBits.flatten().astype(int)
+# Map the estimated symbols back to a packed bitstream through the mapper's lookup table
+receivedBits = mapper.positions_to_packed(estimatedSymbols.astype(int))
 
 # Calculate the Bit Error Rate (BER)
-# Count the number of bit errors by comparing the transmitted and received bitstreams
-numErrors = np.sum(dataBits != receivedBits)
+# Count the number of bit errors: XOR the packed transmitted and received words and count the set bits
+numErrors = dataBits.count_errors(receivedBits)
 # Calculate the Bit Error Rate (BER) as the ratio of errors to the total number of bits
 ber = numErrors / len(dataBits)
 
 # Display the results
 print(f'Number of errors: {numErrors}')
 print(f'Bit Error Rate (BER): {ber:.5f}')
+
+# BER-vs-SNR curve: the batched engine simulates every SNR value in one pass,
+# streaming blocks of OFDM symbols through a pipeline in which the transmitter,
+# the channel and the receiver (FFT + demapping) run concurrently in worker threads
+# on bounded queues of blocks, so memory stays constant however long the run is
+engine = OFDMEngine(numSubcarriers, cpLength, modOrder, kind='psk')
+curveErrors, curveBits = engine.run_pipelined(SNR_range, numSymbols)
+for snr, errors in zip(SNR_range, curveErrors):
+    print(f'SNR = {snr:2d} dB: BER = {errors / curveBits:.5f}')
+
+# Record a long received stream to an IQ capture file (header + raw complex64 samples),
+# block by block, so the sampled stream never has to be held in memory; only the transmitted
+# labels are kept (one byte each) to count the errors. The file goes to a temporary directory
+# that is removed at the end.
+rng = np.random.default_rng(0)
+channel = AWGNChannel(signal_power=engine.signalPower, precision='single')
+captureLabels = np.empty((captureSymbols, numSubcarriers), dtype=np.uint8)
+metadata = dict(numSubcarriers=numSubcarriers, cpLength=cpLength, modOrder=modOrder, kind='psk', SNR_dB=SNR_dB)
+with tempfile.TemporaryDirectory() as captureDir:
+    capturePath = os.path.join(captureDir, 'ofdm_capture.iq')
+    with CaptureWriter(capturePath, metadata) as writer:
+        for start in range(0, captureSymbols, engine.framesPerBlock):
+            txLabels = captureLabels[start:start + engine.framesPerBlock]
+            txLabels[...] = rng.integers(0, modOrder, txLabels.shape, dtype=np.uint8)
+            writer.write(channel.add_noise(engine.transmit(txLabels), SNR_dB, rng))
+
+    # Run the receiver offline on the memory-mapped capture: CP removal, FFT and demapping
+    # work on views of the mapped file, one block of OFDM symbols at a time
+    with IQCapture(capturePath) as capture:
+        captureErrors = 0
+        row = 0
+        for rxLabels in engine.receive(capture.samples):
+            captureErrors += popcount(rxLabels ^ captureLabels[row:row + len(rxLabels)])
+            row += len(rxLabels)
+print(f"Capture ({capture.metadata['SNR_dB']} dB, {captureSymbols} OFDM symbols): "
+      f"BER = {captureErrors / (captureLabels.size * bitsPerSymbol):.5f}")
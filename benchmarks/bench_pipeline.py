@@ -0,0 +1,326 @@
+"""
+Throughput benchmarks for every stage of the simulation pipeline.
+
+Measures symbols/s and bits/s of each stage (pulse shaping, AWGN, detection,
+block-code encode/decode, OFDM IFFT/CP/FFT/demap), of the end-to-end
+links and of their fused channel-detect-count variants, for sizes from
+10^3 up to 10^8 symbols. Sizes above --chunk are run as repeated chunks,
+so memory stays bounded. Results are written as JSON and compared against
+a stored baseline; a stage whose throughput drops by more than --tolerance
+is reported as a regression (exit code 1).
+
+Usage (from the repository root):
+    python benchmarks/bench_pipeline.py --sizes 1e3,1e4,1e5,1e6
+    python benchmarks/bench_pipeline.py --save-baseline
+    python benchmarks/bench_pipeline.py --stages ofdm --sizes 1e8
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from digcom.block_code import G_7_4, SoftDecisionDecoder, SyndromeDecoder, coded_bpsk_trial, encode, parity_check_matrix
+from digcom.channel import AWGNChannel
+from digcom import fused
+from digcom.fused import coded_bpsk_fused_trial, pam_fused_trial, qam16_fused_trial
+from digcom.mapping import SymbolMapper
+from digcom.ofdm import OFDMEngine
+from digcom.pam import pam_trial
+from digcom.pulse import PulseShaper
+from digcom.qam import qam16_trial
+from digcom.slicer import Slicer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(HERE, 'results', 'latest.json')
+
+NUM_SUBCARRIERS = 64
+CP_LENGTH = 16
+
+
+# Every stage factory takes (num_symbols, rng) and returns (function to time, bits per symbol).
+# The function processes num_symbols symbols (codewords for the block code; OFDM stages round
+# down to whole OFDM symbols of NUM_SUBCARRIERS subcarrier symbols).
+
+def stage_pam_shape(n, rng):
+    shaper = PulseShaper(0.25, 4, 1e-3, 1e4)
+    symbols = 2.0 * rng.integers(0, 2, n) - 1
+    return partial(shaper.transmit, symbols), 1
+
+
+def stage_pam_matched_filter(n, rng):
+    shaper = PulseShaper(0.25, 4, 1e-3, 1e4)
+    waveform = shaper.transmit(2.0 * rng.integers(0, 2, n) - 1)
+    return partial(shaper.receive, waveform, n), 1
+
+
+def stage_awgn(n, rng, precision='double'):
+    channel = AWGNChannel(signal_power=1, precision=precision)
+    signal = channel.cast(np.zeros(n, dtype=complex))
+    return partial(channel.add_noise, signal, 10.0, rng), 2
+
+
+def stage_detect(n, rng, kind, modOrder):
+    mapper = SymbolMapper(modOrder, kind=kind, gray=True)
+    slicer = Slicer(mapper)
+    received = mapper.points[rng.integers(0, modOrder, n)]
+    out = np.empty(n, dtype=np.intp)
+    return partial(slicer.detect, received, out), mapper.bitsPerSymbol
+
+
+def _hamming_decoder():
+    return SyndromeDecoder(G_7_4, parity_check_matrix(G_7_4))
+
+
+def stage_hamming_encode(n, rng):
+    # n codewords, 4 message bits each
+    decoder = _hamming_decoder()
+    message = rng.integers(0, 2, (n, decoder.k), dtype=np.uint8)
+    return partial(encode, message, decoder.G), decoder.k
+
+
+def stage_hamming_syndrome_decode(n, rng):
+    decoder = _hamming_decoder()
+    received = rng.integers(0, 2, (n, decoder.n), dtype=np.uint8)
+    return partial(decoder.decode, received), decoder.k
+
+
+def stage_hamming_packed_decode(n, rng):
+    decoder = _hamming_decoder()
+    received = rng.integers(0, 1 << decoder.n, n)
+    return partial(decoder.decode_words, received), decoder.k
+
+
+def stage_hamming_soft_decode(n, rng):
+    decoder = SoftDecisionDecoder(G_7_4, parity_check_matrix(G_7_4))
+    received = rng.standard_normal((n, decoder.n)).astype(np.float32)
+    return partial(decoder.decode_soft_words, received), decoder.k
+
+
+def _ofdm_frames(n, rng):
+    numFrames = max(1, n // NUM_SUBCARRIERS)
+    mapper = SymbolMapper(4, kind='psk')
+    return mapper, mapper.points[rng.integers(0, 4, (numFrames, NUM_SUBCARRIERS))].astype(np.complex64)
+
+
+def stage_ofdm_ifft_cp(n, rng):
+    from scipy.fft import ifft
+    mapper, frames = _ofdm_frames(n, rng)
+    txSignal = np.empty((frames.shape[0], NUM_SUBCARRIERS + CP_LENGTH), dtype=np.complex64)
+
+    def run():
+        txSignal[:, CP_LENGTH:] = ifft(frames, axis=-1, workers=-1)
+        txSignal[:, :CP_LENGTH] = txSignal[:, NUM_SUBCARRIERS:]
+    return run, mapper.bitsPerSymbol
+
+
+def stage_ofdm_fft(n, rng):
+    from scipy.fft import fft
+    mapper, frames = _ofdm_frames(n, rng)
+    rxSignal = np.concatenate([frames[:, -CP_LENGTH:], frames], axis=1)
+    return partial(fft, rxSignal[:, CP_LENGTH:], axis=-1, workers=-1), mapper.bitsPerSymbol
+
+
+def stage_ofdm_demap(n, rng):
+    mapper, frames = _ofdm_frames(n, rng)
+    slicer = Slicer(mapper)
+    return partial(slicer.detect_bits, frames), mapper.bitsPerSymbol
+
+
+def link_pam(n, rng):
+    trial = partial(pam_trial, M=2, shaper=PulseShaper(0.25, 4, 1e-3, 1e4))
+    return partial(trial, n, 6.0, rng), 1
+
+
+def link_qam16(n, rng):
+    return partial(qam16_trial, n, 10.0, rng), 4
+
+
+def link_hamming(n, rng):
+    trial = partial(coded_bpsk_trial, decoder=_hamming_decoder())
+    return partial(trial, n, 4.0, rng), 4
+
+
+def fused_pam(n, rng):
+    return partial(pam_fused_trial, n, 6.0, rng), 1
+
+
+def fused_qam16(n, rng):
+    return partial(qam16_fused_trial, n, 10.0, rng), 4
+
+
+def fused_hamming(n, rng):
+    trial = partial(coded_bpsk_fused_trial, decoder=_hamming_decoder())
+    return partial(trial, n, 4.0, rng), 4
+
+
+def link_ofdm(n, rng):
+    engine = OFDMEngine(NUM_SUBCARRIERS, CP_LENGTH, 4)
+    return partial(engine.run, 10.0, max(1, n // NUM_SUBCARRIERS), rng), 2
+
+
+STAGES = {
+    'pam.shape': stage_pam_shape,
+    'pam.matched_filter': stage_pam_matched_filter,
+    'channel.awgn_double': partial(stage_awgn, precision='double'),
+    'channel.awgn_single': partial(stage_awgn, precision='single'),
+    'detect.pam4': partial(stage_detect, kind='pam', modOrder=4),
+    'detect.qam16': partial(stage_detect, kind='qam', modOrder=16),
+    'detect.qam1024': partial(stage_detect, kind='qam', modOrder=1024),
+    'hamming.encode': stage_hamming_encode,
+    'hamming.syndrome_decode': stage_hamming_syndrome_decode,
+    'hamming.packed_decode': stage_hamming_packed_decode,
+    'hamming.soft_ml_decode': stage_hamming_soft_decode,
+    'ofdm.ifft_cp': stage_ofdm_ifft_cp,
+    'ofdm.fft': stage_ofdm_fft,
+    'ofdm.demap': stage_ofdm_demap,
+    'link.pam': link_pam,
+    'link.qam16': link_qam16,
+    'link.hamming': link_hamming,
+    'link.ofdm': link_ofdm,
+    'fused.pam': fused_pam,
+    'fused.qam16': fused_qam16,
+    'fused.hamming': fused_hamming,
+}
+
+
+def check_fused_backends(size, seed):
+    """
+    Runs every fused trial with the numba and the numpy kernel from the same generator seed.
+
+    Returns:
+    - Names of the trials (and precisions) whose error counts differ; empty, without running anything,
+      when numba is not installed.
+    """
+    if fused.numba is None:
+        return []
+    trials = {
+        'fused.pam': partial(pam_fused_trial, M=4),
+        'fused.qam16': qam16_fused_trial,
+        'fused.hamming': partial(coded_bpsk_fused_trial, decoder=_hamming_decoder()),
+    }
+    mismatched = []
+    for name, trial in trials.items():
+        for precision in ('single', 'double'):
+            counts = [trial(size, 4.0, np.random.default_rng(seed), channel=AWGNChannel(1, precision), backend=backend)
+                      for backend in ('numba', 'numpy')]
+            if counts[0] != counts[1]:
+                mismatched.append(f"{name} ({precision}): numba {counts[0][0]} vs numpy {counts[1][0]} errors")
+    return mismatched
+
+
+def measure(factory, size, chunk, repeat, rng):
+    """
+    Times ``size`` symbols of a stage, as repeated chunks of at most ``chunk`` symbols.
+
+    Returns:
+    - (best time in seconds over ``repeat`` runs, bits per symbol).
+    """
+    chunk_size = min(size, chunk)
+    num_chunks, rest = divmod(size, chunk_size)
+    run, bits_per_symbol = factory(chunk_size, rng)
+    run_rest = factory(rest, rng)[0] if rest else None
+    run()  # warm-up: caches, FFT plans, lazy imports
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(num_chunks):
+            run()
+        if run_rest is not None:
+            run_rest()
+        best = min(best, time.perf_counter() - start)
+    return best, bits_per_symbol
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the results whose throughput dropped by more than ``tolerance`` versus the baseline.
+    """
+    reference = {(r['stage'], r['size']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = reference.get((result['stage'], result['size']))
+        if old and result['symbols_per_s'] < (1 - tolerance) * old['symbols_per_s']:
+            regressions.append(dict(result, baseline_symbols_per_s=old['symbols_per_s'],
+                                    ratio=result['symbols_per_s'] / old['symbols_per_s']))
+    return regressions
+
+
+def parse_sizes(text):
+    return [int(float(v)) for v in text.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=parse_sizes, default=parse_sizes('1e3,1e4,1e5,1e6'),
+                        help='comma-separated numbers of symbols (default 1e3,1e4,1e5,1e6)')
+    parser.add_argument('--stages', default='',
+                        help='comma-separated stage name prefixes to run (default: all)')
+    parser.add_argument('--chunk', type=lambda v: int(float(v)), default=10**6,
+                        help='largest block processed at once (default 1e6)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per measurement; the best is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON results file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='relative throughput drop reported as a regression (default 0.2)')
+    args = parser.parse_args(argv)
+
+    prefixes = [p for p in args.stages.split(',') if p]
+    stages = {name: f for name, f in STAGES.items() if not prefixes or any(name.startswith(p) for p in prefixes)}
+    rng = np.random.default_rng(args.seed)
+
+    results = []
+    for name, factory in stages.items():
+        for size in args.sizes:
+            seconds, bits_per_symbol = measure(factory, size, args.chunk, args.repeat, rng)
+            result = dict(stage=name, size=size, seconds=seconds, symbols_per_s=size / seconds,
+                          bits_per_s=size * bits_per_symbol / seconds)
+            results.append(result)
+            print(f"{name:<26} {size:>11,d}  {result['symbols_per_s']:>14,.0f} sym/s  "
+                  f"{result['bits_per_s']:>14,.0f} bit/s")
+
+    # The fused kernels must count the same errors whichever backend compiled them
+    mismatched = check_fused_backends(10**5, args.seed) if any(n.startswith('fused') for n in stages) else []
+    for mismatch in mismatched:
+        print(f"BACKEND MISMATCH {mismatch}")
+
+    import scipy
+    report = {
+        'meta': dict(time=time.strftime('%Y-%m-%dT%H:%M:%S'), python=platform.python_version(),
+                     numpy=np.__version__, scipy=scipy.__version__, machine=platform.machine(),
+                     processor=platform.processor(), cpu_count=os.cpu_count(),
+                     fused_backend=fused.default_backend()),
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    status = 0
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['stage']} at {r['size']:,d} symbols: "
+                  f"{r['symbols_per_s']:,.0f} sym/s vs {r['baseline_symbols_per_s']:,.0f} baseline "
+                  f"({r['ratio']:.0%})")
+        status = 1 if regressions else 0
+        if not regressions:
+            print("No regressions against the baseline.")
+    return 1 if mismatched else status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,7 @@
+"""
+Shared simulation building blocks for the Digital Communications projects.
+
+The numbered project folders (1/ to 4/) keep their plotting scripts; the
+reusable pieces (BER estimation, modulation, channels, decoders) live here
+so that every script runs on the same engine.
+"""
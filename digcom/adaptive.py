@@ -0,0 +1,100 @@
+"""
+Adaptive SNR grids for BER curves.
+
+Instead of a fixed uniform grid, adaptive_sweep simulates a coarse grid
+and then bisects only the intervals where the curve needs more points:
+where log10(BER) bends away from a straight line, or where a point
+disagrees with a theoretical reference (by more than a tolerance and
+outside the point's confidence interval). The coarse grid runs one batch
+of points per worker at a time and is cut after the first point below the
+BER floor, so at most one batch is spent past it. Every point draws from
+a generator derived from (seed, SNR), so a point does not depend on the
+order in which the grid was refined, and with a ResultCache the refined
+points are cached like any other sweep.
+"""
+import os
+
+import numpy as np
+
+from .sweep import run_tasks
+
+
+def _point_seed(seed_seq, snr_db):
+    # One stream per SNR value, keyed by the bit pattern of the float
+    return np.random.SeedSequence(seed_seq.entropy, spawn_key=(int(np.float64(snr_db).view(np.uint64)),))
+
+
+def _log_ber(point):
+    # Zero-error points count at their upper confidence bound
+    return np.log10(point.ber if point.num_errors else point.confidence_interval()[1])
+
+
+def adaptive_sweep(trial, snr_db_range, ber_floor=1e-6, theory=None, min_step=0.5, bend_tolerance=0.15,
+                   theory_tolerance=0.1, max_points=40, seed=None, workers=None, cache=None, config=None, **kwargs):
+    """
+    Runs a BER sweep on a coarse grid and refines it where the curve bends or deviates from theory.
+
+    Parameters:
+    - trial: Picklable trial function, see digcom.ber.simulate_ber.
+    - snr_db_range: Coarse, increasing SNR grid in dB (e.g. np.arange(0, 21, 4)).
+    - ber_floor: Stop at the first SNR whose BER is below this value (or that has no errors).
+    - theory: Optional callable ``theory(snr_db) -> error rate`` used as the reference.
+    - min_step: Intervals narrower than this (dB) are not split any more.
+    - bend_tolerance: Largest deviation (in decades) of log10(BER) at a point from the straight line
+      through its neighbours before the two intervals around it are split.
+    - theory_tolerance: Deviation (in decades) from ``theory`` that splits the intervals around a point,
+      provided the reference is also outside the point's 95% confidence interval.
+    - max_points: Upper bound on the total number of simulated SNR points.
+    - seed: Seed (int, SeedSequence or None) of the per-point generators.
+    - workers: Number of worker processes; defaults to os.cpu_count(). The coarse grid runs in batches
+      of one point per worker, and every batch of refined points runs in parallel.
+    - cache, config: Optional ResultCache and configuration dict; points then go through
+      digcom.cache.cached_sweep (which needs an integer seed).
+    - kwargs: Stopping parameters forwarded to simulate_ber.
+
+    Returns:
+    - List of BERPoint sorted by SNR.
+    """
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    workers = workers or os.cpu_count() or 1
+
+    def simulate(snrs):
+        if cache is not None:
+            from .cache import cached_sweep
+            return cached_sweep(trial, snrs, config, cache, seed=seed, workers=workers, **kwargs)
+        return run_tasks([(trial, snr_db, _point_seed(seed_seq, snr_db), kwargs) for snr_db in snrs], workers)
+
+    # Coarse pass, in batches of one point per worker, so at most one batch runs past the floor
+    coarse = [float(snr_db) for snr_db in snr_db_range]
+    points = []
+    while coarse and len(points) < max_points:
+        batch, coarse = coarse[:workers], coarse[workers:]
+        points += simulate(batch)
+        below = [i for i, point in enumerate(points) if point.num_errors == 0 or point.ber < ber_floor]
+        if below:
+            del points[below[0] + 1:]
+            break
+
+    # Refinement: bisect the flagged intervals until the curve is smooth or the budget is spent
+    while len(points) < max_points:
+        flagged = set()
+        logs = [_log_ber(point) for point in points]
+        for i in range(1, len(points) - 1):
+            left, right = points[i - 1].snr_db, points[i + 1].snr_db
+            expected = logs[i - 1] + (logs[i + 1] - logs[i - 1]) * (points[i].snr_db - left) / (right - left)
+            if abs(logs[i] - expected) > bend_tolerance:
+                flagged.update((i - 1, i))
+        if theory is not None:
+            for i, point in enumerate(points):
+                low, high = point.confidence_interval()
+                reference = theory(point.snr_db)
+                if not low <= reference <= high and abs(logs[i] - np.log10(reference)) > theory_tolerance:
+                    flagged.update(j for j in (i - 1, i) if 0 <= j < len(points) - 1)
+        new = sorted((points[i].snr_db + points[i + 1].snr_db) / 2 for i in flagged
+                     if points[i + 1].snr_db - points[i].snr_db > min_step)
+        new = new[:max_points - len(points)]
+        if not new:
+            break
+        points = sorted(points + simulate(new), key=lambda point: point.snr_db)
+    return points
+
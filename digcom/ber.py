@@ -0,0 +1,111 @@
+"""
+Chunked Monte Carlo BER estimation.
+
+A link is described by a trial function ``trial(num_symbols, snr_db, rng)``
+that simulates ``num_symbols`` symbols at one SNR and returns
+``(num_errors, num_trials)``. The engine calls it in fixed-size chunks and
+stops each SNR point once enough errors were seen or the symbol budget is
+spent, so memory stays bounded by the chunk size.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+# Q-function definition (scipy is imported on first use to keep startup fast)
+def Q(x):
+    from scipy.special import erfc
+    return 0.5 * erfc(x / np.sqrt(2))
+
+
+@dataclass
+class BERPoint:
+    """
+    Error statistics collected at a single SNR value.
+
+    Parameters:
+    - snr_db: SNR of the point in dB.
+    - num_errors: Number of counted errors (bit or symbol errors, depending on the trial).
+    - num_trials: Number of compared bits/symbols.
+    - num_symbols: Number of simulated channel symbols.
+    """
+    snr_db: float
+    num_errors: int = 0
+    num_trials: int = 0
+    num_symbols: int = 0
+
+    @property
+    def ber(self):
+        return self.num_errors / self.num_trials if self.num_trials else np.nan
+
+    def merge(self, other):
+        """
+        Adds the counts of another BERPoint (same SNR, independent data) to this one.
+        """
+        self.num_errors += other.num_errors
+        self.num_trials += other.num_trials
+        self.num_symbols += other.num_symbols
+        return self
+
+    def confidence_interval(self, level=0.95):
+        """
+        Exact (Clopper-Pearson) confidence interval of the error rate.
+
+        Parameters:
+        - level: Confidence level, e.g. 0.95 for a 95% interval.
+
+        Returns:
+        - (lower, upper) bounds of the error rate.
+        """
+        from scipy.special import betaincinv
+        k, n = self.num_errors, self.num_trials
+        if n == 0:
+            return 0.0, 1.0
+        alpha = 1 - level
+        lower = betaincinv(k, n - k + 1, alpha / 2) if k > 0 else 0.0
+        upper = betaincinv(k + 1, n - k, 1 - alpha / 2) if k < n else 1.0
+        return float(lower), float(upper)
+
+
+def simulate_ber(trial, snr_db, target_errors=100, max_symbols=10**7,
+                 chunk_size=10000, rng=None):
+    """
+    Runs a trial function in chunks until enough errors are collected.
+
+    Parameters:
+    - trial: Callable ``trial(num_symbols, snr_db, rng) -> (num_errors, num_trials)``.
+    - snr_db: SNR value in dB.
+    - target_errors: Stop once this many errors have been counted.
+    - max_symbols: Symbol budget for the point; the run stops here even with fewer errors.
+    - chunk_size: Number of symbols simulated per call to ``trial``.
+    - rng: np.random.Generator (or seed) used for all chunks.
+
+    Returns:
+    - BERPoint with the accumulated counts.
+    """
+    rng = np.random.default_rng(rng)
+    point = BERPoint(float(snr_db))
+    while point.num_errors < target_errors and point.num_symbols < max_symbols:
+        n = min(chunk_size, max_symbols - point.num_symbols)
+        num_errors, num_trials = trial(n, snr_db, rng)
+        point.num_errors += int(num_errors)
+        point.num_trials += int(num_trials)
+        point.num_symbols += n
+    return point
+
+
+def ber_curve(trial, snr_db_range, rng=None, **kwargs):
+    """
+    Runs simulate_ber for every SNR value of a sweep.
+
+    Parameters:
+    - trial: Trial function, see simulate_ber.
+    - snr_db_range: Iterable of SNR values in dB.
+    - rng: np.random.Generator (or seed) shared by all points.
+    - kwargs: Stopping parameters forwarded to simulate_ber.
+
+    Returns:
+    - List of BERPoint, one per SNR value.
+    """
+    rng = np.random.default_rng(rng)
+    return [simulate_ber(trial, snr_db, rng=rng, **kwargs) for snr_db in snr_db_range]
@@ -0,0 +1,91 @@
+"""
+Bit-packed bitstreams.
+
+Bits are stored eight per byte (MSB first, like np.packbits) in a buffer
+padded to whole uint64 words, i.e. 64x less memory than an int64 bit
+array. Errors between two streams are counted by XOR-ing the words and
+taking a popcount, without ever unpacking the bits.
+"""
+import numpy as np
+
+# Bit count of every byte value, used when np.bitwise_count is unavailable (NumPy < 2.0)
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words, axis=None):
+    """
+    Returns the number of set bits in an integer array.
+
+    Parameters:
+    - words: Non-negative integer array.
+    - axis: Axis or axes to sum over; None sums everything and returns an int.
+    """
+    words = np.ascontiguousarray(words)
+    if hasattr(np, 'bitwise_count'):
+        counts = np.bitwise_count(words).sum(axis=axis, dtype=np.int64)
+    else:
+        per_word = _POPCOUNT8[words.view(np.uint8)].reshape(*words.shape, -1).sum(axis=-1, dtype=np.int64)
+        counts = per_word.sum(axis=axis, dtype=np.int64)
+    return int(counts) if axis is None else counts
+
+
+class PackedBits:
+    """
+    A fixed-length bitstream packed into uint64 words.
+
+    Parameters:
+    - data: uint8 buffer of packed bits (MSB first); padded with zero bytes to a multiple of 8.
+    - num_bits: Number of valid bits; the padding bits must be zero.
+    """
+
+    def __init__(self, data, num_bits):
+        data = np.asarray(data, dtype=np.uint8).ravel()
+        padding = -len(data) % 8
+        if padding:
+            data = np.concatenate([data, np.zeros(padding, dtype=np.uint8)])
+        self.data = data
+        self.num_bits = int(num_bits)
+
+    @classmethod
+    def from_bits(cls, bits):
+        """
+        Packs an array of 0/1 values.
+        """
+        bits = np.asarray(bits).ravel()
+        return cls(np.packbits(bits.astype(np.uint8, copy=False)), bits.size)
+
+    @classmethod
+    def random(cls, num_bits, rng=None):
+        """
+        Draws num_bits uniformly random bits directly in packed form.
+        """
+        rng = np.random.default_rng(rng)
+        data = rng.integers(0, 256, -(-num_bits // 8), dtype=np.uint8)
+        if num_bits % 8:
+            data[-1] &= np.uint8(0xFF << (8 - num_bits % 8) & 0xFF)
+        return cls(data, num_bits)
+
+    @property
+    def words(self):
+        return self.data.view(np.uint64)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def __len__(self):
+        return self.num_bits
+
+    def unpack(self):
+        """
+        Returns the bits as a uint8 array of 0/1 values.
+        """
+        return np.unpackbits(self.data, count=self.num_bits)
+
+    def count_errors(self, other):
+        """
+        Counts the positions at which this stream and ``other`` differ.
+        """
+        if other.num_bits != self.num_bits:
+            raise ValueError(f"bitstreams differ in length: {self.num_bits} != {other.num_bits}")
+        return popcount(self.words ^ other.words)
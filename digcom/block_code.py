@@ -0,0 +1,330 @@
+"""
+Linear block code over BPSK used by project 3.
+"""
+from itertools import combinations
+
+import numpy as np
+
+from .bitstream import popcount
+from .channel import AWGNChannel
+from .profiling import stage
+
+# Systematic generator matrix of the (7,4) code used in project 3
+G_7_4 = np.array([[1, 0, 0, 0, 1, 0, 1],
+                  [0, 1, 0, 0, 1, 1, 1],
+                  [0, 0, 1, 0, 0, 1, 1],
+                  [0, 0, 0, 1, 1, 1, 0]])
+
+# Largest n for which the full received-word -> message table is built (2^n entries)
+MAX_TABLE_BITS = 16
+
+# Largest k for which soft decoding searches the whole codebook (exact ML); above it a Chase list is used
+MAX_ML_MESSAGE_BITS = 16
+
+# Elements of one correlation block (received rows x codewords) in soft ML decoding; must hold
+# at least the 2**MAX_ML_MESSAGE_BITS codewords of one row
+SOFT_BLOCK_SIZE = 2**22
+
+
+def encode(message, G):
+    """
+    Encodes the rows of ``message`` (shape (..., k)) with generator matrix G.
+    """
+    return np.mod(message @ G, 2).astype(np.uint8)
+
+
+def _gf2_pivots(M):
+    # Pivot columns of M in row echelon form over GF(2); len() is the rank of M
+    M = np.array(M, dtype=np.uint8) & 1
+    pivots, row = [], 0
+    for col in range(M.shape[1]):
+        candidates = np.flatnonzero(M[row:, col])
+        if candidates.size == 0:
+            continue
+        M[[row, row + candidates[0]]] = M[[row + candidates[0], row]]
+        others = np.flatnonzero(M[:, col])
+        M[others[others != row]] ^= M[row]
+        pivots.append(col)
+        row += 1
+        if row == M.shape[0]:
+            break
+    return pivots
+
+
+def _gf2_inverse(M):
+    # Inverse of a square, invertible matrix over GF(2) by Gauss-Jordan elimination
+    size = len(M)
+    augmented = np.hstack([np.array(M, dtype=np.uint8) & 1, np.eye(size, dtype=np.uint8)])
+    for col in range(size):
+        pivot = col + np.flatnonzero(augmented[col:, col])[0]
+        augmented[[col, pivot]] = augmented[[pivot, col]]
+        others = np.flatnonzero(augmented[:, col])
+        augmented[others[others != col]] ^= augmented[col]
+    return augmented[:, size:]
+
+
+def parity_check_matrix(G):
+    """
+    Builds H = [P^T | I] for a systematic generator matrix G = [I | P].
+    """
+    k, n = G.shape
+    return np.hstack([G[:, k:].T, np.eye(n - k, dtype=G.dtype)])
+
+
+class SyndromeDecoder:
+    """
+    Batched hard-decision syndrome decoder for an arbitrary binary (n, k) code.
+
+    The syndrome of every possible error pattern is precomputed once: each of
+    the 2^(n-k) syndromes maps to its minimum-weight error pattern (coset
+    leader). Decoding a batch is then one matrix product for the syndromes,
+    a table lookup and an XOR.
+
+    G does not have to be systematic: the message is read from k linearly
+    independent codeword positions, multiplied by the inverse of G
+    restricted to them (mod 2). When G contains an identity sub-matrix those
+    positions hold the message bits directly and no product is needed.
+
+    Codewords can also be handled in packed form, one integer per codeword
+    (MSB first). For n <= MAX_TABLE_BITS a codebook and a complete
+    received-word -> message table make encoding and decoding a single
+    lookup each.
+
+    Parameters:
+    - G: Generator matrix (k x n).
+    - H: Parity-check matrix ((n-k) x n); must satisfy G @ H.T = 0 (mod 2).
+    """
+
+    def __init__(self, G, H):
+        self.G = np.asarray(G, dtype=np.uint8)
+        self.H = np.asarray(H, dtype=np.uint8)
+        self.k, self.n = self.G.shape
+        if self.H.shape[1] != self.n:
+            raise ValueError(f"H has {self.H.shape[1]} columns, expected {self.n}")
+        if np.any(np.mod(self.G.astype(int) @ self.H.T, 2)):
+            raise ValueError("G and H are not orthogonal (G @ H.T != 0 mod 2)")
+        # Weights that turn a syndrome bit vector into a table index
+        self._syndrome_weights = 1 << np.arange(self.H.shape[0] - 1, -1, -1, dtype=np.int64)
+        self.table = self._build_table()
+        self.message_positions, self.message_inverse = self._find_message_positions()
+        self.codebook = self.decode_table = None
+        if self.n <= MAX_TABLE_BITS:
+            self.codebook = self.pack(encode(self.unpack(np.arange(1 << self.k), self.k), self.G))
+            self.decode_table = self.pack(self.decode(self.unpack(np.arange(1 << self.n), self.n)))
+
+    def _build_table(self):
+        num_syndromes = 1 << self.H.shape[0]
+        table = np.zeros((num_syndromes, self.n), dtype=np.uint8)
+        filled = np.zeros(num_syndromes, dtype=bool)
+        filled[0] = True
+        for weight in range(1, self.n + 1):
+            for positions in combinations(range(self.n), weight):
+                error_pattern = np.zeros(self.n, dtype=np.uint8)
+                error_pattern[list(positions)] = 1
+                index = self.syndrome_index(error_pattern[np.newaxis])[0]
+                if not filled[index]:
+                    table[index] = error_pattern
+                    filled[index] = True
+            if filled.all():
+                break
+        return table
+
+    def _find_message_positions(self):
+        # Column j carries message bit i when G[:, j] is the unit vector e_i
+        positions = []
+        for i in range(self.k):
+            unit = np.zeros(self.k, dtype=np.uint8)
+            unit[i] = 1
+            matches = np.flatnonzero(np.all(self.G.T == unit, axis=1))
+            if matches.size == 0:
+                break
+            positions.append(matches[0])
+        else:
+            return np.array(positions), None
+        # Non-systematic G: message = codeword[:, pivots] @ inverse(G[:, pivots]) (mod 2)
+        pivots = _gf2_pivots(self.G)
+        if len(pivots) < self.k:
+            raise ValueError(f"G has rank {len(pivots)} over GF(2), expected {self.k}")
+        return np.array(pivots), _gf2_inverse(self.G[:, pivots]).astype(np.int64)
+
+    def message_bits(self, codeword):
+        """
+        Returns the message bits of a batch of (corrected) codewords, shape (num_codewords, k).
+        """
+        message = codeword[:, self.message_positions]
+        if self.message_inverse is None:
+            return message
+        return ((message @ self.message_inverse) & 1).astype(np.uint8)
+
+    @staticmethod
+    def pack(bits):
+        """
+        Packs the rows of a bit matrix into one integer per row (MSB first).
+        """
+        weights = 1 << np.arange(bits.shape[-1] - 1, -1, -1, dtype=np.int64)
+        return bits.astype(np.int64, copy=False) @ weights
+
+    @staticmethod
+    def unpack(words, width):
+        """
+        Expands integers into rows of ``width`` bits (MSB first).
+        """
+        return ((np.asarray(words, dtype=np.int64)[..., np.newaxis] >> np.arange(width - 1, -1, -1)) & 1).astype(np.uint8)
+
+    def encode_words(self, message_words):
+        """
+        Encodes packed k-bit messages into packed n-bit codewords.
+        """
+        if self.codebook is not None:
+            return self.codebook[message_words]
+        return self.pack(encode(self.unpack(message_words, self.k), self.G))
+
+    def decode_words(self, received_words):
+        """
+        Decodes packed n-bit hard-decision codewords into packed k-bit messages.
+        """
+        if self.decode_table is not None:
+            return self.decode_table[received_words]
+        return self.pack(self.decode(self.unpack(received_words, self.n)))
+
+    def syndrome_index(self, received_codeword):
+        """
+        Returns the integer syndrome of every row of ``received_codeword``.
+        """
+        syndrome = (received_codeword @ self.H.T.astype(np.int64)) & 1
+        return syndrome @ self._syndrome_weights
+
+    def correct(self, received_codeword):
+        """
+        Corrects a batch of hard-decision codewords, shape (num_codewords, n).
+        """
+        received_codeword = np.asarray(received_codeword, dtype=np.uint8)
+        return received_codeword ^ self.table[self.syndrome_index(received_codeword)]
+
+    def decode(self, received_codeword):
+        """
+        Corrects a batch of codewords and returns the decoded messages, shape (num_codewords, k).
+        """
+        return self.message_bits(self.correct(received_codeword))
+
+
+class SoftDecisionDecoder(SyndromeDecoder):
+    """
+    Batched soft-decision decoder for BPSK (bit b sent as 2b - 1) over AWGN.
+
+    For k <= MAX_ML_MESSAGE_BITS it is the maximum-likelihood decoder: the
+    received soft values are correlated with every +-1 codeword in one
+    matrix product (BLAS), and the codeword with the largest correlation
+    wins. Received rows are processed in blocks of at most SOFT_BLOCK_SIZE
+    correlations, so memory stays bounded for any batch.
+
+    Larger codes use a Chase-2 list search instead: the ``num_flips`` least
+    reliable hard decisions are flipped in all 2^num_flips combinations,
+    every test pattern is syndrome decoded, and the candidate codeword with
+    the largest correlation is kept.
+
+    Hard-decision decoding (decode, decode_words) is inherited unchanged.
+
+    Parameters:
+    - G: Generator matrix (k x n).
+    - H: Parity-check matrix ((n-k) x n).
+    - num_flips: Number of least reliable positions flipped by the Chase search.
+    """
+
+    def __init__(self, G, H, num_flips=4):
+        super().__init__(G, H)
+        self.num_flips = min(num_flips, self.n)
+        self.signed_codebook = None
+        if self.k <= MAX_ML_MESSAGE_BITS:
+            codebook_bits = encode(self.unpack(np.arange(1 << self.k), self.k), self.G)
+            self.signed_codebook = 2 * codebook_bits.astype(np.float32) - 1
+
+    def _ml_search(self, received):
+        codebook = self.signed_codebook.astype(received.dtype, copy=False)
+        # 2**MAX_ML_MESSAGE_BITS codewords fit in one block, so only the received rows need blocking
+        rows_per_block = max(1, SOFT_BLOCK_SIZE // len(codebook))
+        best = np.empty(len(received), dtype=np.int64)
+        for start in range(0, len(received), rows_per_block):
+            rows = received[start:start + rows_per_block]
+            np.argmax(rows @ codebook.T, axis=1, out=best[start:start + rows_per_block])
+        return best
+
+    def _chase_search(self, received):
+        hard = (received > 0).astype(np.uint8)
+        weak = np.argpartition(np.abs(received), self.num_flips - 1, axis=1)[:, :self.num_flips]
+        rows = np.arange(len(received))[:, np.newaxis]
+        best_score = np.full(len(received), -np.inf, dtype=received.dtype)
+        best_codeword = np.empty_like(hard)
+        for pattern in range(1 << self.num_flips):
+            test = hard.copy()
+            test[rows, weak] ^= self.unpack(pattern, self.num_flips).astype(np.uint8)
+            candidate = self.correct(test)
+            score = np.einsum('ij,ij->i', received, 2 * candidate.astype(received.dtype) - 1)
+            better = score > best_score
+            best_score[better] = score[better]
+            best_codeword[better] = candidate[better]
+        return self.pack(self.message_bits(best_codeword))
+
+    def decode_soft_words(self, received):
+        """
+        Decodes soft BPSK values into packed k-bit messages.
+
+        Parameters:
+        - received: Received values, shape (num_codewords, n) or flat; real dtype (float32 runs in single precision).
+
+        Returns:
+        - One packed message integer per codeword.
+        """
+        received = np.asarray(received)
+        if received.dtype not in (np.float32, np.float64):
+            received = received.astype(np.float64)
+        received = received.reshape(-1, self.n)
+        if self.signed_codebook is not None:
+            return self._ml_search(received)
+        return self._chase_search(received)
+
+    def decode_soft(self, received):
+        """
+        Decodes soft BPSK values and returns the messages as bit rows, shape (num_codewords, k).
+        """
+        return self.unpack(self.decode_soft_words(received), self.k)
+
+
+def coded_bpsk_trial(num_symbols, snr_db, rng, decoder, channel=None, soft=False):
+    """
+    Simulates one chunk of block-coded BPSK over an AWGN channel.
+
+    Parameters:
+    - num_symbols: Number of k-bit messages (codewords) in the chunk.
+    - snr_db: SNR in dB.
+    - rng: np.random.Generator used for data and noise.
+    - decoder: SyndromeDecoder of the code (a SoftDecisionDecoder when ``soft`` is set).
+    - channel: AWGNChannel; defaults to signal_power=1, i.e. noise power 10^(-SNR/10)
+      as in the project script.
+    - soft: Decode the received values with soft-decision ML instead of hard decisions.
+
+    Returns:
+    - (number of message bit errors, number of message bits).
+    """
+    channel = channel if channel is not None else AWGNChannel(signal_power=1)
+    with stage('source', num_symbols):
+        message = rng.integers(0, 1 << decoder.k, num_symbols)
+    with stage('encode', num_symbols):
+        codeword = decoder.encode_words(message)
+    with stage('modulate', num_symbols):
+        modulated_signal = decoder.unpack(codeword, decoder.n).ravel().astype(channel.real_dtype)
+        modulated_signal *= 2
+        modulated_signal -= 1
+    with stage('channel', num_symbols):
+        received_signal = channel.add_noise(modulated_signal, snr_db, rng)
+    if soft:
+        with stage('decode', num_symbols):
+            decoded = decoder.decode_soft_words(received_signal)
+    else:
+        with stage('detect', num_symbols):
+            received_codeword = decoder.pack((received_signal > 0).reshape(-1, decoder.n))
+        with stage('decode', num_symbols):
+            decoded = decoder.decode_words(received_codeword)
+    with stage('count', num_symbols):
+        num_errors = popcount(decoded ^ message)
+    return num_errors, num_symbols * decoder.k
@@ -0,0 +1,159 @@
+"""
+Persistent, content-addressed cache of BER sweep points.
+
+Every point is stored under the SHA-256 of its full configuration (link
+parameters, trial function, SNR and seed) as a small JSON file holding the
+raw error and trial counts. A later run with a larger error target or
+symbol budget only simulates the missing part, drawing from the next
+generator of the point's seed stream, and adds it to the stored counts.
+The cache directory is kept under a size limit by evicting the least
+recently used points.
+"""
+import hashlib
+import json
+import os
+from functools import partial
+
+import numpy as np
+
+from .ber import BERPoint
+from .sweep import run_tasks
+
+
+def _canonical(value):
+    # JSON-compatible, deterministic form of a configuration value
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return {'dtype': value.dtype.str, 'shape': list(value.shape), 'data': _canonical(value.ravel().tolist())}
+    if isinstance(value, np.generic):
+        return _canonical(value.item())
+    if isinstance(value, complex):
+        return [value.real, value.imag]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"cannot hash configuration value of type {type(value).__name__}")
+
+
+def _trial_name(trial):
+    while isinstance(trial, partial):
+        trial = trial.func
+    if not hasattr(trial, '__qualname__'):
+        trial = type(trial)
+    return f"{trial.__module__}.{trial.__qualname__}"
+
+
+def config_key(config):
+    """
+    Returns the SHA-256 hex digest of a configuration dictionary.
+    """
+    encoded = json.dumps(_canonical(config), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Directory of cached BER points with least-recently-used eviction.
+
+    Parameters:
+    - directory: Cache directory; created if missing.
+    - max_bytes: Size limit of the stored records.
+    """
+
+    def __init__(self, directory, max_bytes=64 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """
+        Returns the stored record for ``key`` (or None) and marks it as recently used.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(path)
+        return record
+
+    def put(self, key, record):
+        """
+        Stores a record atomically; call evict() afterwards to apply the size limit.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """
+        Deletes least recently used records until the cache fits in max_bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def cached_sweep(trial, snr_db_range, config, cache, seed=0, workers=None,
+                 target_errors=100, max_symbols=10**7, chunk_size=10000):
+    """
+    Runs a BER sweep, reusing and extending the points stored in a ResultCache.
+
+    Parameters:
+    - trial: Picklable trial function, see digcom.ber.simulate_ber.
+    - snr_db_range: Iterable of SNR values in dB.
+    - config: Dictionary describing everything the result depends on (modulation, code, filter, ...).
+    - cache: ResultCache instance.
+    - seed: Integer root of the per-point seed streams.
+    - workers: Number of worker processes for the points that need more trials.
+    - target_errors, max_symbols, chunk_size: Stopping parameters, as in simulate_ber,
+      applied to the accumulated counts.
+
+    Returns:
+    - List of BERPoint, one per SNR value.
+    """
+    if seed is None:
+        raise ValueError("cached sweeps need an integer seed")
+    points, tasks, pending = [], [], []
+    for snr_db in snr_db_range:
+        snr_db = float(snr_db)
+        identity = {'config': config, 'trial': _trial_name(trial), 'snr_db': snr_db, 'seed': seed}
+        key = config_key(identity)
+        record = cache.get(key) or dict(_canonical(identity), num_errors=0, num_trials=0, num_symbols=0, num_runs=0)
+        point = BERPoint(snr_db, record['num_errors'], record['num_trials'], record['num_symbols'])
+        if point.num_errors < target_errors and point.num_symbols < max_symbols:
+            # Run r of a point always draws from the same generator, independent of the SNR grid
+            seed_seq = np.random.SeedSequence(seed, spawn_key=(int(key[:15], 16), record['num_runs']))
+            kwargs = {'target_errors': target_errors - point.num_errors,
+                      'max_symbols': max_symbols - point.num_symbols, 'chunk_size': chunk_size}
+            tasks.append((trial, snr_db, seed_seq, kwargs))
+            pending.append((point, key, record))
+        points.append(point)
+
+    for (point, key, record), result in zip(pending, run_tasks(tasks, workers)):
+        point.merge(result)
+        record.update(num_errors=point.num_errors, num_trials=point.num_trials,
+                      num_symbols=point.num_symbols, num_runs=record['num_runs'] + 1)
+        cache.put(key, record)
+    if pending:
+        cache.evict()
+    return points
@@ -0,0 +1,127 @@
+"""
+On-disk IQ capture files.
+
+A capture is a fixed header followed by the raw complex64 samples:
+
+    offset 0   8 bytes  magic b'DCIQ\\r\\n\\x1a\\n'
+    offset 8   uint32   format version (1)
+    offset 12  uint32   header size in bytes (a multiple of 4096, so the body is page aligned)
+    offset 16  uint64   number of samples
+    offset 24  ...      UTF-8 JSON metadata, NUL padded to the header size
+
+All integers are little endian. Captures are written in chunks by
+CaptureWriter, so streams of several GB never have to fit in memory, and
+read back through ``np.memmap``: slicing IQCapture.samples yields views
+of the mapped file, and only the pages a receiver touches are read from
+disk.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'DCIQ\r\n\x1a\n'
+VERSION = 1
+_HEADER = struct.Struct('<8sIIQ')
+_ALIGNMENT = 4096
+
+
+def _header_size(metadata_bytes):
+    return -(-(_HEADER.size + len(metadata_bytes)) // _ALIGNMENT) * _ALIGNMENT
+
+
+class CaptureWriter:
+    """
+    Writes an IQ capture file chunk by chunk.
+
+    The sample count in the header is filled in by close() (or on leaving the ``with`` block).
+
+    Parameters:
+    - path: Output file; an existing file is overwritten.
+    - metadata: JSON-serializable dict stored in the header (sample rate, OFDM parameters, SNR, ...).
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self.num_samples = 0
+        metadata_bytes = json.dumps(self.metadata).encode()
+        self.header_size = _header_size(metadata_bytes)
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, VERSION, self.header_size, 0))
+        self._file.write(metadata_bytes.ljust(self.header_size - _HEADER.size, b'\0'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def write(self, samples):
+        """
+        Appends samples (converted to complex64 if needed) to the capture.
+        """
+        samples = np.ascontiguousarray(samples, dtype=np.complex64)
+        samples.tofile(self._file)
+        self.num_samples += samples.size
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, self.header_size, self.num_samples))
+        self._file.close()
+
+
+class IQCapture:
+    """
+    Memory-mapped IQ capture file.
+
+    Parameters:
+    - path: Capture file written by CaptureWriter.
+    - mode: 'r' (read only) or 'r+' (samples can be modified in place).
+
+    Attributes:
+    - metadata: Dict stored in the header.
+    - samples: complex64 np.memmap over the body (an empty array for an empty capture).
+    """
+
+    def __init__(self, path, mode='r'):
+        if mode not in ('r', 'r+'):
+            raise ValueError(f"mode must be 'r' or 'r+', got {mode!r}")
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, header_size, num_samples = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an IQ capture file")
+            if version != VERSION:
+                raise ValueError(f"unsupported IQ capture version {version}")
+            self.metadata = json.loads(f.read(header_size - _HEADER.size).rstrip(b'\0') or b'{}')
+        body_size = os.path.getsize(path) - header_size
+        if body_size < num_samples * np.dtype(np.complex64).itemsize:
+            raise ValueError(f"{path} is truncated: header announces {num_samples} samples")
+        self.header_size = header_size
+        if num_samples:
+            self.samples = np.memmap(path, dtype=np.complex64, mode=mode, offset=header_size, shape=(num_samples,))
+        else:
+            self.samples = np.empty(0, dtype=np.complex64)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.samples.size
+
+    def close(self):
+        """
+        Flushes pending writes (mode 'r+') and releases the mapping.
+        """
+        if isinstance(self.samples, np.memmap):
+            self.samples.flush()
+        self.samples = np.empty(0, dtype=np.complex64)
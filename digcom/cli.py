@@ -0,0 +1,292 @@
+"""
+Headless command-line entry point: ``python -m digcom <simulation> [options]``.
+
+Runs the PAM, 16-QAM, block-coded BPSK and OFDM simulations without a
+display and writes the BER points as JSON or CSV. Simulation modules,
+scipy and matplotlib are only imported once a command needs them, so a
+short job is not dominated by interpreter startup.
+"""
+import argparse
+import json
+import sys
+
+
+def parse_snr(text):
+    """
+    Parses an SNR grid given as 'start:stop:step' (stop excluded, like np.arange) or 'a,b,c'.
+    """
+    import numpy as np
+    if ':' in text:
+        start, stop, step = (float(v) for v in text.split(':'))
+        grid = np.arange(start, stop, step)
+    else:
+        grid = np.array([float(v) for v in text.split(',')])
+    if grid.size == 0:
+        raise argparse.ArgumentTypeError(f"SNR grid {text!r} is empty")
+    return grid
+
+
+def _channel(args):
+    if args.importance_sampling:
+        from .importance import BiasedAWGNChannel
+        return BiasedAWGNChannel(signal_power=1, precision=args.precision)
+    from .channel import AWGNChannel
+    return AWGNChannel(signal_power=1, precision=args.precision)
+
+
+def _sweep(args, trial, config, is_trial=None, theory=None):
+    if args.importance_sampling:
+        from .importance import ber_curve_is
+        return ber_curve_is(is_trial, args.snr, rng=args.seed, target_relative_error=args.target_relative_error,
+                            max_symbols=args.max_symbols, chunk_size=args.chunk_size)
+    if args.adaptive:
+        from .adaptive import adaptive_sweep
+        cache = None
+        if args.cache:
+            from .cache import ResultCache
+            cache = ResultCache(args.cache)
+        return adaptive_sweep(trial, args.snr, ber_floor=args.ber_floor, theory=theory, min_step=args.min_step,
+                              seed=args.seed, workers=args.workers, cache=cache, config=config,
+                              target_errors=args.target_errors, max_symbols=args.max_symbols,
+                              chunk_size=args.chunk_size)
+    if args.cache:
+        from .cache import ResultCache, cached_sweep
+        return cached_sweep(trial, args.snr, config, ResultCache(args.cache), seed=args.seed, workers=args.workers,
+                            target_errors=args.target_errors, max_symbols=args.max_symbols,
+                            chunk_size=args.chunk_size)
+    from .sweep import parallel_sweep
+    return parallel_sweep(trial, args.snr, seed=args.seed, workers=args.workers,
+                          target_errors=args.target_errors, max_symbols=args.max_symbols,
+                          chunk_size=args.chunk_size)
+
+
+def run_pam(args):
+    from functools import partial
+    from .pam import pam_symbol_error_probability, pam_trial
+    if args.importance_sampling:
+        # The importance-sampled link is the symbol-spaced channel after the matched filter
+        from .importance import pam_is_trial
+        config = dict(M=args.levels, A=1, importance_sampling=True, precision=args.precision)
+        return config, _sweep(args, None, config, partial(pam_is_trial, M=args.levels, channel=_channel(args)))
+    if args.fused:
+        # The fused kernel works per symbol, i.e. on the symbol-spaced channel after the matched filter
+        from .fused import pam_fused_trial
+        config = dict(M=args.levels, A=1, fused=True, precision=args.precision)
+        return config, _sweep(args, partial(pam_fused_trial, M=args.levels, channel=_channel(args)), config,
+                              theory=partial(pam_symbol_error_probability, M=args.levels))
+    shaper = None
+    if args.span > 0:
+        from .pulse import PulseShaper
+        shaper = PulseShaper(args.roll_off, args.span, 1.0, args.sps)
+    config = dict(M=args.levels, A=1, roll_off=args.roll_off, span=args.span, sps=args.sps, precision=args.precision)
+    return config, _sweep(args, partial(pam_trial, M=args.levels, shaper=shaper, channel=_channel(args)), config,
+                          theory=partial(pam_symbol_error_probability, M=args.levels))
+
+
+def run_qam16(args):
+    from functools import partial
+    from .qam import qam16_symbol_error_probability, qam16_trial
+    config = dict(modulation='16qam', precision=args.precision)
+    channel = _channel(args)
+    is_trial = None
+    if args.importance_sampling:
+        from .importance import qam16_is_trial
+        config['importance_sampling'] = True
+        is_trial = partial(qam16_is_trial, channel=channel)
+    trial = partial(qam16_trial, channel=channel)
+    if args.fused:
+        from .fused import qam16_fused_trial
+        config['fused'] = True
+        trial = partial(qam16_fused_trial, channel=channel)
+    return config, _sweep(args, trial, config, is_trial, theory=qam16_symbol_error_probability)
+
+
+def run_hamming(args):
+    from functools import partial
+    from .block_code import G_7_4, SoftDecisionDecoder, SyndromeDecoder, coded_bpsk_trial, parity_check_matrix
+    decoder = (SoftDecisionDecoder if args.soft else SyndromeDecoder)(G_7_4, parity_check_matrix(G_7_4))
+    config = dict(code='hamming_7_4', G=G_7_4, precision=args.precision)
+    if args.soft:
+        config['decoding'] = 'soft_ml'
+    channel = _channel(args)
+    is_trial = None
+    if args.importance_sampling:
+        from .importance import coded_bpsk_is_trial
+        config['importance_sampling'] = True
+        is_trial = partial(coded_bpsk_is_trial, decoder=decoder, channel=channel)
+    trial = partial(coded_bpsk_trial, decoder=decoder, channel=channel, soft=args.soft)
+    if args.fused and not args.soft:
+        from .fused import coded_bpsk_fused_trial
+        config['fused'] = True
+        trial = partial(coded_bpsk_fused_trial, decoder=decoder, channel=channel)
+    return config, _sweep(args, trial, config, is_trial)
+
+
+def run_ofdm(args):
+    from .ofdm import OFDMEngine
+    engine = OFDMEngine(args.subcarriers, args.cp_length, args.mod_order, kind=args.kind, gray=args.gray)
+    config = dict(numSubcarriers=args.subcarriers, cpLength=args.cp_length, modOrder=args.mod_order,
+                  kind=args.kind, gray=args.gray)
+    if args.pipelined:
+        from .ber import BERPoint
+        numErrors, numBits = engine.run_pipelined(args.snr, args.symbols, rng=args.seed)
+        return config, [BERPoint(float(snr), int(errors), numBits, args.symbols)
+                        for snr, errors in zip(args.snr, numErrors)]
+    return config, engine.ber_curve(args.snr, args.symbols, rng=args.seed)
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--snr', type=parse_snr, default='0:21:2',
+                        help="SNR grid in dB, 'start:stop:step' or 'a,b,c' (default 0:21:2)")
+    common.add_argument('--seed', type=int, default=0, help='root seed of the simulation (default 0)')
+    common.add_argument('--format', choices=('json', 'csv'), default='json', help='output format')
+    common.add_argument('--output', help='write results to this file instead of stdout')
+    common.add_argument('--plot', metavar='FILE', help='also save a BER plot (imports matplotlib)')
+    common.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help='time every pipeline stage; print the breakdown to stderr or export it '
+                             'to a .json/.csv FILE')
+    common.add_argument('--profile-memory', action='store_true',
+                        help='with --profile, also record the peak allocation per stage (tracemalloc)')
+
+    monte_carlo = argparse.ArgumentParser(add_help=False)
+    monte_carlo.add_argument('--target-errors', type=int,
+                             help='errors to collect per SNR point (default 100)')
+    monte_carlo.add_argument('--max-symbols', type=lambda v: int(float(v)), default=10**7,
+                             help='symbol budget per SNR point')
+    monte_carlo.add_argument('--chunk-size', type=lambda v: int(float(v)), default=10000,
+                             help='symbols simulated per chunk')
+    monte_carlo.add_argument('--workers', type=int, help='worker processes (default 1)')
+    monte_carlo.add_argument('--cache', metavar='DIR', help='reuse and extend BER points cached in DIR')
+    monte_carlo.add_argument('--precision', choices=('double', 'single'), default='double',
+                             help='channel precision (default double)')
+    monte_carlo.add_argument('--fused', action='store_true',
+                             help='add noise, slice and count errors in one cache-blocked pass (numba if installed, '
+                                  'else numpy); pam uses the symbol-spaced channel, hamming only hard decisions')
+    monte_carlo.add_argument('--adaptive', action='store_true',
+                             help='treat --snr as a coarse grid and refine it where the curve bends or deviates '
+                                  'from theory, stopping below --ber-floor')
+    monte_carlo.add_argument('--ber-floor', type=float, default=1e-6,
+                             help='with --adaptive, no SNR beyond the first point below this BER (default 1e-6)')
+    monte_carlo.add_argument('--min-step', type=float, default=0.5,
+                             help='with --adaptive, smallest SNR spacing in dB (default 0.5)')
+    monte_carlo.add_argument('--importance-sampling', action='store_true',
+                             help='estimate deep-tail BER with boundary-biased noise and likelihood-ratio weights '
+                                  '(runs in-process, without --fused, --adaptive, --cache, --workers or '
+                                  '--target-errors; pam uses the ideal matched-filter channel, hamming only hard '
+                                  'decisions)')
+    monte_carlo.add_argument('--target-relative-error', type=float, default=0.1,
+                             help='with --importance-sampling, stop a point at this std_error / BER (default 0.1)')
+
+    parser = argparse.ArgumentParser(prog='digcom', description='Run the digital communication simulations '
+                                     'headless and write their BER points as JSON or CSV.')
+    commands = parser.add_subparsers(dest='simulation', required=True)
+
+    pam = commands.add_parser('pam', parents=[common, monte_carlo], help='M-PAM with RRC pulse shaping')
+    pam.add_argument('--levels', type=int, default=2, help='number of PAM levels (default 2)')
+    pam.add_argument('--roll-off', type=float, default=0.25, help='RRC roll-off factor')
+    pam.add_argument('--span', type=int, default=4, help='pulse span in symbols; 0 disables pulse shaping')
+    pam.add_argument('--sps', type=int, default=10, help='samples per symbol (fs / RB)')
+    pam.set_defaults(run=run_pam)
+
+    qam = commands.add_parser('qam16', parents=[common, monte_carlo], help='16-QAM over AWGN')
+    qam.set_defaults(run=run_qam16)
+
+    hamming = commands.add_parser('hamming', parents=[common, monte_carlo], help='(7,4) block code over BPSK')
+    hamming.add_argument('--soft', action='store_true', help='soft-decision maximum-likelihood decoding')
+    hamming.set_defaults(run=run_hamming)
+
+    ofdm = commands.add_parser('ofdm', parents=[common], help='OFDM over AWGN (all SNR values in one batch)')
+    ofdm.add_argument('--subcarriers', type=int, default=64, help='number of subcarriers')
+    ofdm.add_argument('--cp-length', type=int, default=16, help='cyclic prefix length')
+    ofdm.add_argument('--mod-order', type=int, default=4, help='modulation order per subcarrier')
+    ofdm.add_argument('--kind', choices=('psk', 'qam', 'pam'), default='psk', help='constellation kind')
+    ofdm.add_argument('--gray', action='store_true', help='use Gray-coded labels')
+    ofdm.add_argument('--symbols', type=int, default=1000, help='OFDM symbols per SNR value')
+    ofdm.add_argument('--pipelined', action='store_true',
+                      help='overlap transmitter, channel and receiver in threads (constant memory for long runs)')
+    ofdm.set_defaults(run=run_ofdm)
+    return parser
+
+
+def _rows(points):
+    rows = []
+    for point in points:
+        low, high = point.confidence_interval()
+        if hasattr(point, 'weighted_errors'):
+            # Importance sampling: the hit count is under the biased noise, the statistics come from the weights
+            row = dict(snr_db=point.snr_db, ber=point.ber, biased_errors=point.num_errors,
+                       num_trials=point.num_trials, num_symbols=point.num_symbols, variance=point.variance,
+                       std_error=point.std_error, relative_error=point.relative_error)
+        else:
+            row = dict(snr_db=point.snr_db, ber=point.ber, num_errors=point.num_errors,
+                       num_trials=point.num_trials, num_symbols=point.num_symbols)
+        rows.append(dict(row, ci_low=low, ci_high=high))
+    return rows
+
+
+def _plot(path, simulation, rows):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(8, 6))
+    plt.semilogy([r['snr_db'] for r in rows], [r['ber'] for r in rows], 'o-')
+    plt.title(f"BER vs SNR ({simulation})")
+    plt.xlabel("SNR (dB)")
+    plt.ylabel("BER")
+    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+    plt.savefig(path)
+
+
+def _check_args(parser, args):
+    if getattr(args, 'importance_sampling', False):
+        # The importance-sampled sweep runs in-process with its own stopping rule and trials
+        ignored = [flag for flag, value in (('--fused', args.fused), ('--adaptive', args.adaptive),
+                                            ('--cache', args.cache), ('--workers', args.workers),
+                                            ('--target-errors', args.target_errors))
+                   if value is not None and value is not False]
+        if getattr(args, 'soft', False):
+            parser.error('--importance-sampling only supports hard-decision decoding, not --soft')
+        if ignored:
+            parser.error(f"--importance-sampling cannot be combined with {', '.join(ignored)}")
+    if getattr(args, 'soft', False) and args.fused:
+        parser.error('--fused only supports hard-decision decoding, not --soft')
+    if hasattr(args, 'workers'):
+        args.workers = args.workers if args.workers is not None else 1
+        args.target_errors = args.target_errors if args.target_errors is not None else 100
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _check_args(parser, args)
+    if args.profile:
+        from .profiling import Profiler
+        with Profiler(track_memory=args.profile_memory) as profiler:
+            config, points = args.run(args)
+        if args.profile == '-':
+            profiler.report(file=sys.stderr)
+        else:
+            profiler.export(args.profile)
+    else:
+        config, points = args.run(args)
+    rows = _rows(points)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump({'simulation': args.simulation, 'seed': args.seed, 'config': config, 'points': rows},
+                      out, default=lambda value: value.tolist())
+            out.write('\n')
+        else:
+            import csv
+            writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.plot:
+        _plot(args.plot, args.simulation, rows)
+    return 0
@@ -0,0 +1,200 @@
+"""
+Fused channel, detection and error counting.
+
+The plain trials materialize the whole chunk at every step: noise,
+received signal, detected positions, the error mask and finally one
+integer. The fused trials instead walk the chunk in blocks of
+BLOCK_SIZE real samples, so that the symbol positions and the noise of a
+block stay in cache, and a single kernel adds the noise to the
+transmitted level, slices the sum to the nearest level and counts the
+errors. Only per-block temporaries are allocated, never chunk-sized ones.
+
+The kernel is compiled with Numba (``numba.njit``) when it is installed;
+it then loops over the samples and allocates nothing but the block's
+output. Otherwise a NumPy version runs the same steps on the block: it
+slices in place in the noise buffer, with the transmitted levels and the
+error mask as per-block temporaries. Both backends take their noise from
+AWGNChannel.noise and perform the same float operations in the same
+order, so they are meant to count the same errors for the same
+generator; benchmarks/bench_pipeline.py checks this whenever numba is
+importable. The fused trials draw their data block by block, though, so
+their random stream differs from that of pam_trial / qam16_trial /
+coded_bpsk_trial (same statistics, different samples).
+"""
+import numpy as np
+
+from .bitstream import popcount
+from .block_code import SyndromeDecoder
+from .channel import AWGNChannel
+from .pam import pam_levels
+from .profiling import stage
+from .qam import QAM16
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Real samples per block: positions, noise and decisions of a block fit in L2 cache
+BLOCK_SIZE = 2**14
+
+
+def _count_symbol_errors_numpy(positions, noise, levels, scale, offset, dims):
+    # The noise buffer becomes the received block and is then sliced in place
+    noise += levels[positions]
+    noise *= scale
+    noise += offset
+    np.rint(noise, out=noise)
+    np.clip(noise, 0, levels.size - 1, out=noise)
+    wrong = noise != positions
+    for dim in range(1, dims):
+        wrong[::dims] |= wrong[dim::dims]
+    return np.count_nonzero(wrong[::dims])
+
+
+def _count_symbol_errors_loop(positions, noise, levels, scale, offset, dims):
+    top = levels.size - 1
+    num_errors = 0
+    for symbol in range(positions.size // dims):
+        wrong = False
+        for i in range(symbol * dims, (symbol + 1) * dims):
+            position = positions[i]
+            detected = np.rint((levels[position] + noise[i]) * scale + offset)
+            if min(max(detected, 0), top) != position:
+                wrong = True
+        if wrong:
+            num_errors += 1
+    return num_errors
+
+
+def _hard_decision_words_numpy(codewords, noise, levels, n):
+    noise = noise.reshape(-1, n)
+    noise += levels[SyndromeDecoder.unpack(codewords, n)]
+    return SyndromeDecoder.pack(noise > 0)
+
+
+def _hard_decision_words_loop(codewords, noise, levels, n):
+    received = np.empty(codewords.size, dtype=np.int64)
+    for word in range(codewords.size):
+        codeword = codewords[word]
+        packed = 0
+        for j in range(n):
+            packed <<= 1
+            if levels[(codeword >> (n - 1 - j)) & 1] + noise[word * n + j] > 0:
+                packed |= 1
+        received[word] = packed
+    return received
+
+
+_KERNELS = {'numpy': (_count_symbol_errors_numpy, _hard_decision_words_numpy)}
+if numba is not None:
+    _jit = numba.njit(cache=True, nogil=True)
+    _KERNELS['numba'] = (_jit(_count_symbol_errors_loop), _jit(_hard_decision_words_loop))
+
+
+def default_backend():
+    """
+    Returns the backend used when none is requested: 'numba' if it is installed, else 'numpy'.
+    """
+    return 'numba' if numba is not None else 'numpy'
+
+
+def _kernels(backend):
+    backend = backend if backend is not None else default_backend()
+    if backend not in ('numba', 'numpy'):
+        raise ValueError(f"backend must be 'numba' or 'numpy', got {backend!r}")
+    if backend not in _KERNELS:
+        raise ImportError("the 'numba' backend needs numba to be installed")
+    return _KERNELS[backend]
+
+
+def _slicing(levels):
+    # Level index = round(x * scale + offset) for uniformly spaced levels, in the dtype of the levels
+    scale = 1 / (levels[1] - levels[0])
+    return levels.dtype.type(scale), levels.dtype.type(-levels[0] * scale)
+
+
+def _symbol_error_trial(num_symbols, snr_db, rng, levels, dims, channel, block_size, backend):
+    count, _ = _kernels(backend)
+    levels = channel.cast(levels)
+    scale, offset = _slicing(levels)
+    if channel.signal_power is None:
+        channel.signal_power = dims * float(np.mean(levels.astype(np.float64) ** 2))
+    symbols_per_block = max(1, block_size // dims)
+    position_dtype = np.uint8 if levels.size <= 256 else np.intp  # narrow draws are much cheaper
+    num_errors = 0
+    for start in range(0, num_symbols, symbols_per_block):
+        size = min(symbols_per_block, num_symbols - start)
+        with stage('source', size):
+            positions = rng.integers(0, levels.size, size * dims, dtype=position_dtype)
+        with stage('channel', size):
+            noise = channel.noise(size * dims, snr_db, rng)
+        with stage('fused', size):
+            num_errors += int(count(positions, noise, levels, scale, offset, dims))
+    return num_errors
+
+
+def pam_fused_trial(num_symbols, snr_db, rng, M=2, A=1, channel=None, block_size=BLOCK_SIZE, backend=None):
+    """
+    Fused counterpart of digcom.pam.pam_trial without pulse shaping.
+
+    Parameters:
+    - num_symbols, snr_db, rng, M, A, channel: As in pam_trial.
+    - block_size: Real samples per block.
+    - backend: 'numba', 'numpy' or None for default_backend().
+
+    Returns:
+    - (number of symbol errors, number of symbols).
+    """
+    channel = channel if channel is not None else AWGNChannel(signal_power=1)
+    return _symbol_error_trial(num_symbols, snr_db, rng, pam_levels(M, A), 1, channel, block_size,
+                               backend), num_symbols
+
+
+def qam16_fused_trial(num_symbols, snr_db, rng, channel=None, block_size=BLOCK_SIZE, backend=None):
+    """
+    Fused counterpart of digcom.qam.qam16_trial.
+
+    A uniform 16-QAM symbol is a pair of independent uniform 4-PAM positions (index = re + 4 * im),
+    so every symbol is handled as two real samples of the unit-power constellation's axis levels.
+
+    Returns:
+    - (number of symbol errors, number of symbols).
+    """
+    channel = channel if channel is not None else AWGNChannel(signal_power=1)
+    levels = np.unique(QAM16.points.real)
+    return _symbol_error_trial(num_symbols, snr_db, rng, levels, 2, channel, block_size, backend), num_symbols
+
+
+def coded_bpsk_fused_trial(num_symbols, snr_db, rng, decoder, channel=None, block_size=BLOCK_SIZE, backend=None):
+    """
+    Fused counterpart of digcom.block_code.coded_bpsk_trial with hard decisions.
+
+    Modulation, noise and slicing run in one kernel that returns packed hard-decision words; they are
+    decoded and their bit errors counted block by block.
+
+    Returns:
+    - (number of message bit errors, number of message bits).
+    """
+    channel = channel if channel is not None else AWGNChannel(signal_power=1)
+    if channel.signal_power is None:
+        channel.signal_power = 1.0
+    _, decide = _kernels(backend)
+    levels = channel.cast(np.array([-1, 1]))
+    words_per_block = max(1, block_size // decoder.n)
+    num_errors = 0
+    for start in range(0, num_symbols, words_per_block):
+        size = min(words_per_block, num_symbols - start)
+        with stage('source', size):
+            message = rng.integers(0, 1 << decoder.k, size)
+        with stage('encode', size):
+            codeword = decoder.encode_words(message)
+        with stage('channel', size):
+            noise = channel.noise(size * decoder.n, snr_db, rng)
+        with stage('fused', size):
+            received_codeword = decide(codeword, noise, levels, decoder.n)
+        with stage('decode', size):
+            decoded = decoder.decode_words(received_codeword)
+        with stage('count', size):
+            num_errors += popcount(decoded ^ message)
+    return num_errors, num_symbols * decoder.k
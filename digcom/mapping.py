@@ -0,0 +1,134 @@
+"""
+Table-driven bit/symbol mapping for PAM, PSK and square QAM.
+
+Bits are grouped MSB first (like np.binary_repr). Every conversion is a
+vectorized shift or a lookup into tables precomputed for the modulation
+order, so no per-symbol Python work is done. Bit-packed streams
+(digcom.bitstream.PackedBits) are split into labels byte-wise when the
+number of bits per symbol divides 8.
+"""
+import numpy as np
+
+from .bitstream import PackedBits
+
+
+def gray_code(values):
+    """
+    Returns the binary-reflected Gray code of every value.
+    """
+    return values ^ (values >> 1)
+
+
+class SymbolMapper:
+    """
+    Maps bits to symbol indices to constellation points and back.
+
+    A constellation position ``p`` is the point's place on the grid: the
+    amplitude level for PAM, the phase step for PSK and ``re + sqrt(M) * im``
+    for square QAM (the layout of project 2). Its label is the integer
+    carried by the bits: equal to ``p`` for natural mapping, or the Gray code
+    of ``p`` (per axis for QAM) so that neighbouring points differ in one bit.
+
+    Parameters:
+    - modOrder: Modulation order M (a power of two; a perfect square for QAM).
+    - kind: 'pam' (levels 2m - M + 1), 'psk' (exp(j*2*pi*m/M)) or 'qam' (unit average power).
+    - gray: Use Gray-coded labels instead of natural binary labels.
+    """
+
+    def __init__(self, modOrder, kind='qam', gray=False):
+        self.modOrder = int(modOrder)
+        self.bitsPerSymbol = int(np.log2(self.modOrder))
+        if 1 << self.bitsPerSymbol != self.modOrder:
+            raise ValueError(f"modOrder must be a power of two, got {modOrder}")
+        self.kind = kind
+        self.gray = gray
+
+        positions = np.arange(self.modOrder)
+        if kind == 'pam':
+            self.points = (2 * positions - self.modOrder + 1).astype(float)
+        elif kind == 'psk':
+            self.points = np.exp(1j * 2 * np.pi * positions / self.modOrder)
+        elif kind == 'qam':
+            side = int(round(np.sqrt(self.modOrder)))
+            if side * side != self.modOrder:
+                raise ValueError(f"square QAM needs an even number of bits per symbol, got modOrder={modOrder}")
+            levels = 2 * np.arange(side) - side + 1
+            self.points = (levels[positions % side] + 1j * levels[positions // side]) / np.sqrt(2 * (self.modOrder - 1) / 3)
+        else:
+            raise ValueError(f"unknown constellation kind {kind!r}")
+
+        # label_of[p]: bit label carried by position p; position_of is its inverse
+        if not gray:
+            self.label_of = positions
+        elif kind == 'qam':
+            self.label_of = gray_code(positions % side) + side * gray_code(positions // side)
+        else:
+            self.label_of = gray_code(positions)
+        self.position_of = np.argsort(self.label_of)
+
+        # Lookup tables used on the hot paths
+        self._shifts = np.arange(self.bitsPerSymbol - 1, -1, -1)
+        self._byte_shifts = np.arange(8 - self.bitsPerSymbol, -1, -self.bitsPerSymbol)
+        self.label_bits = ((self.label_of[:, np.newaxis] >> self._shifts) & 1).astype(np.uint8)
+        self.label_points = self.points[self.position_of]
+
+    def bits_to_labels(self, bits):
+        """
+        Groups a flat bit array (MSB first) into integer labels.
+        """
+        bits = np.asarray(bits).reshape(-1, self.bitsPerSymbol)
+        labels = np.zeros(bits.shape[0], dtype=np.int64)
+        for j in range(self.bitsPerSymbol):
+            labels <<= 1
+            labels |= bits[:, j]
+        return labels
+
+    def labels_to_bits(self, labels):
+        """
+        Expands integer labels into a flat uint8 bit array (MSB first).
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        return ((labels[..., np.newaxis] >> self._shifts) & 1).astype(np.uint8).ravel()
+
+    def modulate(self, bits):
+        """
+        Maps a flat bit array straight to constellation points.
+        """
+        return self.label_points[self.bits_to_labels(bits)]
+
+    def positions_to_bits(self, positions):
+        """
+        Maps detected constellation positions straight to a flat bit array.
+        """
+        return self.label_bits[np.asarray(positions, dtype=np.int64)].ravel()
+
+    def packed_to_labels(self, packed):
+        """
+        Groups a PackedBits stream into integer labels.
+        """
+        if packed.num_bits % self.bitsPerSymbol:
+            raise ValueError(f"{packed.num_bits} bits do not split into {self.bitsPerSymbol}-bit symbols")
+        if 8 % self.bitsPerSymbol:
+            return self.bits_to_labels(packed.unpack())
+        data = packed.data[:-(-packed.num_bits // 8)]
+        labels = (data[:, np.newaxis] >> self._byte_shifts) & (self.modOrder - 1)
+        return labels.ravel()[:packed.num_bits // self.bitsPerSymbol].astype(np.int64)
+
+    def labels_to_packed(self, labels):
+        """
+        Packs integer labels into a PackedBits stream.
+        """
+        labels = np.asarray(labels).ravel()
+        if 8 % self.bitsPerSymbol:
+            return PackedBits.from_bits(self.labels_to_bits(labels))
+        per_byte = len(self._byte_shifts)
+        padded = np.zeros(-(-labels.size // per_byte) * per_byte, dtype=np.uint8)
+        padded[:labels.size] = labels
+        data = np.bitwise_or.reduce(padded.reshape(-1, per_byte) << self._byte_shifts.astype(np.uint8), axis=1)
+        return PackedBits(data, labels.size * self.bitsPerSymbol)
+
+    def positions_to_packed(self, positions):
+        """
+        Maps detected constellation positions straight to a PackedBits stream.
+        """
+        return self.labels_to_packed(self.label_of[np.asarray(positions, dtype=np.int64)])
@@ -0,0 +1,216 @@
+"""
+Batched OFDM link used by project 4.
+
+A whole SNR vector is simulated at once: each block of OFDM symbols is
+modulated and transformed once, then received at every SNR as one
+(numSNR, numFrames, numSubcarriers + cpLength) batch. The cyclic prefix is
+written into and stripped from preallocated buffers through views, the
+FFTs run on scipy.fft with ``workers``/``overwrite_x``, and blocks are
+streamed so peak memory depends on framesPerBlock only. ``receive``
+applies the same receiver block by block to a long recorded stream, such
+as a memory-mapped digcom.capture.IQCapture.
+"""
+import numpy as np
+
+from .ber import BERPoint
+from .bitstream import popcount
+from .mapping import SymbolMapper
+from .profiling import stage
+from .slicer import Slicer
+
+
+class OFDMEngine:
+    """
+    OFDM transmitter, AWGN channel and receiver for many SNR values and frames.
+
+    Parameters:
+    - numSubcarriers: Number of subcarriers (FFT size).
+    - cpLength: Length of the cyclic prefix in samples.
+    - modOrder: Modulation order of every subcarrier.
+    - kind: Constellation kind, 'psk' (as in OFDM.py), 'qam' or 'pam'.
+    - gray: Use Gray-coded labels.
+    - framesPerBlock: Number of OFDM symbols processed per block.
+    - workers: Worker threads for scipy.fft (-1 uses all cores).
+    - dtype: Complex sample type, np.complex64 or np.complex128.
+    """
+
+    def __init__(self, numSubcarriers=64, cpLength=16, modOrder=4, kind='psk', gray=False,
+                 framesPerBlock=256, workers=-1, dtype=np.complex64):
+        self.numSubcarriers = numSubcarriers
+        self.cpLength = cpLength
+        self.mapper = SymbolMapper(modOrder, kind=kind, gray=gray)
+        self.slicer = Slicer(self.mapper)
+        self.framesPerBlock = framesPerBlock
+        self.workers = workers
+        self.dtype = np.dtype(dtype)
+        self.realDtype = np.finfo(self.dtype).dtype
+        self.labelPoints = self.mapper.label_points.astype(self.dtype)
+        # Average power per time-domain sample after an unnormalized IFFT
+        self.signalPower = np.mean(np.abs(self.mapper.points) ** 2) / numSubcarriers
+
+    def transmit(self, labels, out=None):
+        """
+        Modulates OFDM symbols and prepends their cyclic prefix.
+
+        Parameters:
+        - labels: (numFrames, numSubcarriers) integer labels.
+        - out: Optional (numFrames, numSubcarriers + cpLength) array of self.dtype to write into.
+
+        Returns:
+        - Time-domain OFDM symbols with cyclic prefix, one per row.
+        """
+        from scipy.fft import ifft
+        N, cp = self.numSubcarriers, self.cpLength
+        if out is None:
+            out = np.empty((len(labels), N + cp), dtype=self.dtype)
+        out[:, cp:] = ifft(self.labelPoints[labels], axis=-1, workers=self.workers, overwrite_x=True)
+        out[:, :cp] = out[:, N:]  # cyclic prefix: copy of the last cpLength samples
+        return out
+
+    def receive(self, samples):
+        """
+        Demodulates a long stream of OFDM symbols block by block.
+
+        The cyclic prefix is dropped through a view of every block, so a
+        memory-mapped capture (digcom.capture.IQCapture.samples) is read
+        in place and never copied as a whole.
+
+        Parameters:
+        - samples: 1-D array of consecutive OFDM symbols with cyclic prefix; a trailing partial symbol is ignored.
+
+        Yields:
+        - (framesPerBlock, numSubcarriers) detected labels of every block (fewer rows for the last one).
+        """
+        from scipy.fft import fft
+        N, cp = self.numSubcarriers, self.cpLength
+        symbolLength = N + cp
+        numFrames = len(samples) // symbolLength
+        frames = samples[:numFrames * symbolLength].reshape(numFrames, symbolLength)
+        detected = np.empty(self.framesPerBlock * N, dtype=np.intp)
+        for start in range(0, numFrames, self.framesPerBlock):
+            block = frames[start:start + self.framesPerBlock]
+            rxSymbols = fft(block[:, cp:], axis=-1, workers=self.workers)
+            yield self.slicer.detect_labels(rxSymbols, out=detected[:rxSymbols.size].reshape(rxSymbols.shape))
+
+    def run(self, SNR_dB, numSymbols, rng=None):
+        """
+        Simulates numSymbols OFDM symbols at every SNR value.
+
+        Parameters:
+        - SNR_dB: Scalar or vector of SNR values in dB (per subcarrier).
+        - numSymbols: Number of OFDM symbols per SNR value.
+        - rng: np.random.Generator (or seed).
+
+        Returns:
+        - (bit errors per SNR value, number of bits per SNR value).
+        """
+        from scipy.fft import fft
+        rng = np.random.default_rng(rng)
+        SNR_dB = np.atleast_1d(np.asarray(SNR_dB, dtype=float))
+        numSNR = len(SNR_dB)
+        N, cp = self.numSubcarriers, self.cpLength
+        symbolLength = N + cp
+        noiseStd = np.sqrt(self.signalPower / 10 ** (SNR_dB / 10) / 2).astype(self.realDtype)[:, None, None]
+
+        # Flat buffers reused by every block; views of their prefix stay contiguous for short blocks
+        txBuffer = np.empty(self.framesPerBlock * symbolLength, dtype=self.dtype)
+        rxBuffer = np.empty(numSNR * self.framesPerBlock * symbolLength, dtype=self.dtype)
+        numErrors = np.zeros(numSNR, dtype=np.int64)
+        detected = np.empty(numSNR * self.framesPerBlock * N, dtype=np.intp)
+
+        remaining = numSymbols
+        while remaining > 0:
+            numFrames = min(self.framesPerBlock, remaining)
+            numSamples = numSNR * numFrames * N
+            with stage('source', numFrames * N):
+                labels = rng.integers(0, self.mapper.modOrder, (numFrames, N))
+
+            with stage('modulate', numFrames * N):
+                txSignal = txBuffer[:numFrames * symbolLength].reshape(numFrames, symbolLength)
+                self.transmit(labels, out=txSignal)
+
+            with stage('channel', numSamples):
+                rxSignal = rxBuffer[:numSNR * numFrames * symbolLength].reshape(numSNR, numFrames, symbolLength)
+                rng.standard_normal(out=rxSignal.view(self.realDtype), dtype=self.realDtype)
+                rxSignal *= noiseStd
+                rxSignal += txSignal
+
+            with stage('detect', numSamples):
+                rxSymbols = fft(rxSignal[..., cp:], axis=-1, workers=self.workers, overwrite_x=True)
+                rxLabels = self.slicer.detect_labels(rxSymbols, out=detected[:numSamples].reshape(rxSymbols.shape))
+            with stage('count', numSamples):
+                numErrors += popcount(rxLabels ^ labels, axis=(1, 2))
+            remaining -= numFrames
+
+        return numErrors, numSymbols * N * self.mapper.bitsPerSymbol
+
+    def run_pipelined(self, SNR_dB, numSymbols, rng=None, depth=2):
+        """
+        Same simulation as run, with transmitter, channel and receiver overlapped in worker threads.
+
+        Blocks of framesPerBlock OFDM symbols flow through bounded queues
+        (digcom.pipeline), so memory stays constant for any numSymbols. Data
+        and noise come from two generators seeded from ``rng``, hence the
+        error counts differ from run() for the same seed.
+
+        Parameters:
+        - SNR_dB: Scalar or vector of SNR values in dB (per subcarrier).
+        - numSymbols: Number of OFDM symbols per SNR value.
+        - rng: np.random.Generator (or seed).
+        - depth: Maximum number of blocks waiting between two stages.
+
+        Returns:
+        - (bit errors per SNR value, number of bits per SNR value).
+        """
+        from scipy.fft import fft
+        from .pipeline import pipeline
+        rng = np.random.default_rng(rng)
+        dataRng, noiseRng = (np.random.default_rng(rng.integers(0, 2**63, 4)) for _ in range(2))
+        SNR_dB = np.atleast_1d(np.asarray(SNR_dB, dtype=float))
+        numSNR = len(SNR_dB)
+        N, cp = self.numSubcarriers, self.cpLength
+        noiseStd = np.sqrt(self.signalPower / 10 ** (SNR_dB / 10) / 2).astype(self.realDtype)[:, None, None]
+
+        def transmitter():
+            for start in range(0, numSymbols, self.framesPerBlock):
+                numFrames = min(self.framesPerBlock, numSymbols - start)
+                with stage('source', numFrames * N):
+                    labels = dataRng.integers(0, self.mapper.modOrder, (numFrames, N))
+                with stage('modulate', numFrames * N):
+                    txSignal = self.transmit(labels)
+                yield labels, txSignal
+
+        def channel(block):
+            labels, txSignal = block
+            with stage('channel', numSNR * txSignal.shape[0] * N):
+                rxSignal = np.empty((numSNR,) + txSignal.shape, dtype=self.dtype)
+                noiseRng.standard_normal(out=rxSignal.view(self.realDtype), dtype=self.realDtype)
+                rxSignal *= noiseStd
+                rxSignal += txSignal
+            return labels, rxSignal
+
+        def receiver(block):
+            labels, rxSignal = block
+            with stage('detect', numSNR * labels.size):
+                rxSymbols = fft(rxSignal[..., cp:], axis=-1, workers=self.workers, overwrite_x=True)
+                rxLabels = self.slicer.detect_labels(rxSymbols)
+            with stage('count', numSNR * labels.size):
+                return popcount(rxLabels ^ labels, axis=(1, 2))
+
+        numErrors = np.zeros(numSNR, dtype=np.int64)
+        for blockErrors in pipeline(transmitter(), channel, receiver, depth=depth):
+            numErrors += blockErrors
+        return numErrors, numSymbols * N * self.mapper.bitsPerSymbol
+
+    def ber_curve(self, SNR_dB, numSymbols, rng=None):
+        """
+        Runs the engine over an SNR vector and returns one BERPoint per value.
+        """
+        numErrors, numBits = self.run(SNR_dB, numSymbols, rng)
+        return [BERPoint(float(snr), int(errors), numBits, numSymbols)
+                for snr, errors in zip(np.atleast_1d(SNR_dB), numErrors)]
+
+    def __call__(self, num_symbols, snr_db, rng):
+        # Trial interface for digcom.ber / digcom.sweep: num_symbols OFDM symbols at one SNR
+        numErrors, numBits = self.run(snr_db, num_symbols, rng)
+        return int(numErrors[0]), numBits
@@ -0,0 +1,62 @@
+"""
+Baseband M-PAM link used by project 1.
+"""
+import numpy as np
+
+from .ber import Q
+from .channel import AWGNChannel
+from .mapping import SymbolMapper
+from .profiling import stage
+from .slicer import shared_slicer
+
+
+def pam_levels(M, A=1):
+    """
+    Returns the M-PAM amplitude levels A*(2m - M + 1), m = 0..M-1.
+    """
+    return A * SymbolMapper(M, kind='pam').points
+
+
+def pam_symbol_error_probability(snr_db, M=2, A=1):
+    """
+    Symbol error probability of pam_trial without pulse shaping: 2 (1 - 1/M) Q(A / sigma),
+    with the channel's noise variance sigma^2 = 1 / (2 * SNR) per dimension.
+    """
+    return 2 * (1 - 1 / M) * Q(A * np.sqrt(2 * 10 ** (np.asarray(snr_db) / 10)))
+
+
+def pam_trial(num_symbols, snr_db, rng, M=2, A=1, shaper=None, channel=None):
+    """
+    Simulates one chunk of M-PAM symbols over an AWGN channel.
+
+    Parameters:
+    - num_symbols: Number of symbols in the chunk.
+    - snr_db: SNR in dB.
+    - rng: np.random.Generator used for data and noise.
+    - M: Number of amplitude levels.
+    - A: Basic amplitude of the PAM signal.
+    - shaper: Optional digcom.pulse.PulseShaper; the symbols are then pulse shaped at fs,
+      matched filtered and sampled once per symbol before detection.
+    - channel: AWGNChannel; defaults to signal_power=1, i.e. noise variance 1 / (2 * SNR)
+      as in the project scripts.
+
+    Returns:
+    - (number of symbol errors, number of symbols).
+    """
+    channel = channel if channel is not None else AWGNChannel(signal_power=1)
+    with stage('source', num_symbols):
+        indices = rng.integers(0, M, size=num_symbols)
+    with stage('modulate', num_symbols):
+        symbols = channel.cast(pam_levels(M, A))[indices]
+    signal = symbols if shaper is None else shaper.transmit(symbols)
+    with stage('channel', num_symbols):
+        received_signal = channel.add_noise(signal, snr_db, rng)
+    if shaper is not None:
+        received_signal = shaper.receive(received_signal, num_symbols)
+    # Nearest-level detection, thresholds halfway between the levels
+    with stage('detect', num_symbols):
+        slicer = shared_slicer(M, kind='pam', amplitude=A)
+        detected = slicer.detect(received_signal, out=slicer.buffer(received_signal.shape))
+    with stage('count', num_symbols):
+        num_errors = np.count_nonzero(detected != indices)
+    return num_errors, num_symbols
@@ -0,0 +1,97 @@
+"""
+Streaming pipelines of concurrent stages connected by bounded queues.
+
+The source and every stage run in their own thread and hand blocks (e.g.
+a few hundred OFDM frames) to the next one through a queue.Queue of at
+most ``depth`` blocks. While the receiver transforms block i, the channel
+works on block i + 1 and the producer on block i + 2; the heavy NumPy and
+scipy.fft calls release the GIL, so the stages really overlap. At most
+about (depth + 1) blocks per stage are alive at any time, so memory does
+not grow with the length of the run.
+"""
+import queue
+import threading
+
+# Marks the end of the stream in a queue
+_DONE = object()
+
+
+class _Failure:
+    # Carries an exception from a worker thread to the consumer
+    def __init__(self, error):
+        self.error = error
+
+
+def _put(q, item, stop):
+    # Blocking put that gives up once the pipeline is being torn down
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _run_source(source, out, stop):
+    try:
+        for block in source:
+            if not _put(out, block, stop):
+                return
+        _put(out, _DONE, stop)
+    except BaseException as error:
+        _put(out, _Failure(error), stop)
+
+
+def _run_stage(func, inp, out, stop):
+    while not stop.is_set():
+        try:
+            block = inp.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if block is _DONE or isinstance(block, _Failure):
+            _put(out, block, stop)
+            return
+        try:
+            result = func(block)
+        except BaseException as error:
+            _put(out, _Failure(error), stop)
+            return
+        if not _put(out, result, stop):
+            return
+
+
+def pipeline(source, *stages, depth=2):
+    """
+    Streams blocks from ``source`` through ``stages``, each running in its own thread.
+
+    Parameters:
+    - source: Iterable of blocks; it is consumed in a producer thread.
+    - stages: Callables ``stage(block) -> block``, applied in order; every stage gets its own thread,
+      so a stage must not share mutable buffers with another one.
+    - depth: Maximum number of blocks waiting in each queue.
+
+    Yields:
+    - The output of the last stage for every source block, in order, in the calling thread.
+      An exception raised by the source or a stage is re-raised here; closing the generator early
+      stops all threads.
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=depth) for _ in range(len(stages) + 1)]
+    threads = [threading.Thread(target=_run_source, args=(source, queues[0], stop), daemon=True)]
+    threads += [threading.Thread(target=_run_stage, args=(stage, queues[i], queues[i + 1], stop), daemon=True)
+                for i, stage in enumerate(stages)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            block = queues[-1].get()
+            if block is _DONE:
+                return
+            if isinstance(block, _Failure):
+                raise block.error
+            yield block
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
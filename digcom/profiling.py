@@ -0,0 +1,233 @@
+"""
+Per-stage profiling of the simulation pipeline.
+
+The trial functions wrap their stages (source, modulate, shape, channel,
+detect, decode, count) in ``stage(name, items)`` blocks, and library methods
+can be marked with the ``@profiled(name)`` decorator. While no Profiler is
+active both reduce to a single global check, so an unprofiled sweep pays
+nothing measurable. Inside ``with Profiler() as profiler:`` every stage
+accumulates its call count, wall time and processed items, and with
+``track_memory=True`` also its peak traced allocation (tracemalloc).
+Stage times are inclusive of nested stages. Stages running in concurrent
+threads (digcom.pipeline) are timed correctly, but their peak allocations
+overlap, so use memory tracking on single-threaded runs.
+
+Sweeps run in worker processes are profiled in every worker and merged
+into the active profiler, so times are summed over workers.
+"""
+import functools
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+
+# Profiler currently collecting stage timings, None when profiling is disabled
+_active = None
+_DISABLED = nullcontext()
+
+
+@dataclass
+class StageStats:
+    """
+    Accumulated measurements of one pipeline stage.
+
+    Parameters:
+    - calls: Number of times the stage ran.
+    - seconds: Total wall time in seconds.
+    - items: Total number of processed items (symbols, codewords, ...), 0 if not reported.
+    - peak_bytes: Largest traced allocation above the level at stage entry (memory tracking only).
+    """
+    calls: int = 0
+    seconds: float = 0.0
+    items: int = 0
+    peak_bytes: int = 0
+
+    def merge(self, other):
+        """
+        Adds the measurements of another StageStats of the same stage.
+        """
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.items += other.items
+        self.peak_bytes = max(self.peak_bytes, other.peak_bytes)
+        return self
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'items', 'start', 'memory')
+
+    def __init__(self, profiler, name, items):
+        self.profiler = profiler
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        if self.profiler.track_memory:
+            self.memory = self.profiler._enter_memory()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        peak_bytes = self.profiler._exit_memory(self.memory) if self.profiler.track_memory else 0
+        with self.profiler._lock:  # stages of a digcom.pipeline report from several threads
+            stats = self.profiler.stages.get(self.name)
+            if stats is None:
+                stats = self.profiler.stages[self.name] = StageStats()
+            stats.calls += 1
+            stats.seconds += elapsed
+            stats.items += int(self.items)
+            stats.peak_bytes = max(stats.peak_bytes, peak_bytes)
+        return False
+
+
+class Profiler:
+    """
+    Collects per-stage timings while used as a context manager.
+
+    Parameters:
+    - track_memory: Also record the peak allocation of every stage with tracemalloc
+      (tracing slows allocations down noticeably, so timings are less representative).
+    """
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.stages = {}
+        self._previous = None
+        self._started_tracing = False
+        self._memory_stack = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_previous'] = None
+        state['_memory_stack'] = []
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        global _active
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._previous, _active = _active, self
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        _active, self._previous = self._previous, None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    def stage(self, name, items=0):
+        """
+        Returns a context manager that times one execution of a stage.
+        """
+        return _Stage(self, name, items)
+
+    def _enter_memory(self):
+        # tracemalloc keeps a single peak: fold it into the enclosing stages before resetting it
+        current, peak = tracemalloc.get_traced_memory()
+        for entry in self._memory_stack:
+            entry[1] = max(entry[1], peak)
+        tracemalloc.reset_peak()
+        entry = [current, current]
+        self._memory_stack.append(entry)
+        return entry
+
+    def _exit_memory(self, entry):
+        self._memory_stack.remove(entry)
+        start, peak = entry
+        return max(peak, tracemalloc.get_traced_memory()[1]) - start
+
+    def merge(self, other):
+        """
+        Adds the stages of another Profiler (e.g. from a worker process) to this one.
+        """
+        for name, stats in other.stages.items():
+            self.stages.setdefault(name, StageStats()).merge(stats)
+        return self
+
+    def to_dict(self):
+        """
+        Returns the breakdown as {stage name: measurements} in order of decreasing time.
+        """
+        ordered = sorted(self.stages.items(), key=lambda item: item[1].seconds, reverse=True)
+        return {name: asdict(stats) for name, stats in ordered}
+
+    def report(self, file=None):
+        """
+        Prints the breakdown as a table (stdout by default).
+        """
+        file = file if file is not None else sys.stdout
+        total = sum(stats.seconds for stats in self.stages.values()) or 1.0
+        header = f"{'stage':<16}{'calls':>9}{'time (s)':>12}{'share':>8}{'items/s':>15}"
+        if self.track_memory:
+            header += f"{'peak (MiB)':>12}"
+        print(header, file=file)
+        for name, stats in self.to_dict().items():
+            rate = f"{stats['items'] / stats['seconds']:,.0f}" if stats['items'] and stats['seconds'] else '-'
+            line = (f"{name:<16}{stats['calls']:>9}{stats['seconds']:>12.4f}"
+                    f"{stats['seconds'] / total:>8.1%}{rate:>15}")
+            if self.track_memory:
+                line += f"{stats['peak_bytes'] / 2**20:>12.2f}"
+            print(line, file=file)
+
+    def export(self, path):
+        """
+        Writes the breakdown to a .json or .csv file (chosen by the extension).
+        """
+        stages = self.to_dict()
+        with open(path, 'w', newline='') as f:
+            if str(path).endswith('.csv'):
+                import csv
+                writer = csv.writer(f)
+                writer.writerow(['stage', *StageStats.__dataclass_fields__])
+                for name, stats in stages.items():
+                    writer.writerow([name, *stats.values()])
+            else:
+                json.dump({'track_memory': self.track_memory, 'stages': stages}, f, indent=2)
+
+
+def active():
+    """
+    Returns the Profiler currently collecting stage timings, or None.
+    """
+    return _active
+
+
+def stage(name, items=0):
+    """
+    Context manager timing one stage in the active Profiler; a shared no-op when profiling is off.
+
+    Parameters:
+    - name: Stage name, e.g. 'modulate', 'channel', 'detect'.
+    - items: Number of items processed by this execution (for the items/s column).
+    """
+    if _active is None:
+        return _DISABLED
+    return _active.stage(name, items)
+
+
+def profiled(name):
+    """
+    Decorator reporting every call of a function as one execution of stage ``name``.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
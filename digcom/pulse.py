@@ -0,0 +1,121 @@
+"""
+Pulse shaping and matched filtering for the PAM simulations.
+
+The transmitter upsamples the symbols by fs/RB and filters them with a
+root-raised-cosine pulse; the receiver applies the same (matched) filter
+and samples once per symbol, so the cascade is a raised-cosine (Nyquist)
+response. Filtering runs through scipy's polyphase ``upfirdn`` or FFT
+overlap-add (``oaconvolve``) instead of direct convolution, and the taps
+are cached per (roll_off, span, T_symbol, fs). scipy.signal is slow to
+import, so it is only loaded when a PulseShaper is created (not on the
+first filtered chunk, which would otherwise carry the import in the
+'shape' stage timing).
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from .profiling import profiled
+
+
+def _time_grid(span, T_symbol, fs):
+    sps = int(round(T_symbol * fs))
+    return np.arange(-span * sps, span * sps + 1) / sps, sps
+
+
+@lru_cache(maxsize=None)
+def root_raised_cosine_pulse(roll_off, span, T_symbol, fs):
+    """
+    Root-raised-cosine pulse sampled at fs over +-span symbol durations.
+
+    The taps have unit energy, so a transmit/matched-filter pair returns the
+    symbol amplitudes and leaves the noise variance per sample unchanged.
+
+    Parameters:
+    - roll_off: Roll-off factor (0..1).
+    - span: Number of symbol durations on each side of the peak.
+    - T_symbol: Symbol duration in seconds.
+    - fs: Sampling rate in Hz (fs * T_symbol samples per symbol).
+
+    Returns:
+    - Read-only tap array of length 2 * span * fs * T_symbol + 1.
+    """
+    t, _ = _time_grid(span, T_symbol, fs)
+    h = np.empty_like(t)
+    center = np.isclose(t, 0)
+    quarter = np.isclose(np.abs(4 * roll_off * t), 1) if roll_off > 0 else np.zeros_like(center)
+    regular = ~(center | quarter)
+    tr = t[regular]
+    h[regular] = ((np.sin(np.pi * tr * (1 - roll_off)) + 4 * roll_off * tr * np.cos(np.pi * tr * (1 + roll_off)))
+                  / (np.pi * tr * (1 - (4 * roll_off * tr) ** 2)))
+    h[center] = 1 - roll_off + 4 * roll_off / np.pi
+    if roll_off > 0:
+        h[quarter] = roll_off / np.sqrt(2) * ((1 + 2 / np.pi) * np.sin(np.pi / (4 * roll_off))
+                                              + (1 - 2 / np.pi) * np.cos(np.pi / (4 * roll_off)))
+    h /= np.sqrt(np.sum(h ** 2))
+    h.flags.writeable = False
+    return h
+
+
+class PulseShaper:
+    """
+    Root-raised-cosine transmit filter and matched receive filter.
+
+    Parameters:
+    - roll_off: Roll-off factor.
+    - span: Number of symbol durations on each side of the pulse peak.
+    - T_symbol: Symbol duration in seconds.
+    - fs: Sampling rate in Hz; fs * T_symbol must be an integer.
+    - method: 'upfirdn' (polyphase) or 'fft' (overlap-add).
+    """
+
+    def __init__(self, roll_off, span, T_symbol, fs, method='upfirdn'):
+        if method not in ('upfirdn', 'fft'):
+            raise ValueError(f"unknown filtering method {method!r}")
+        import scipy.signal  # noqa: F401  (import once here, the filter methods then find it loaded)
+        self.taps = root_raised_cosine_pulse(roll_off, span, T_symbol, fs)
+        self.sps = int(round(T_symbol * fs))
+        self.span = span
+        self.method = method
+
+    def _taps_like(self, signal):
+        # Taps in the precision of the signal, so single-precision runs stay in float32
+        signal = np.asarray(signal)
+        if signal.dtype in (np.float32, np.complex64):
+            return self.taps.astype(np.float32)
+        return self.taps
+
+    @profiled('shape')
+    def transmit(self, symbols):
+        """
+        Upsamples the symbols by fs * T_symbol and applies the pulse.
+
+        Returns:
+        - Waveform of length (len(symbols) - 1) * sps + len(taps).
+        """
+        from scipy.signal import oaconvolve, upfirdn
+        taps = self._taps_like(symbols)
+        if self.method == 'upfirdn':
+            return upfirdn(taps, symbols, up=self.sps)
+        upsampled = np.zeros((len(symbols) - 1) * self.sps + 1, dtype=np.result_type(symbols, taps))
+        upsampled[::self.sps] = symbols
+        return oaconvolve(upsampled, taps)
+
+    @profiled('matched_filter')
+    def receive(self, signal, num_symbols):
+        """
+        Applies the matched filter and samples at the symbol instants.
+
+        Parameters:
+        - signal: Received waveform, as produced by transmit plus noise.
+        - num_symbols: Number of transmitted symbols.
+
+        Returns:
+        - One matched-filter output per symbol.
+        """
+        from scipy.signal import oaconvolve, upfirdn
+        delay = 2 * self.span  # both filters together delay the peak by 2 * span symbols
+        matched = self._taps_like(signal)[::-1]
+        if self.method == 'upfirdn':
+            return upfirdn(matched, signal, down=self.sps)[delay:delay + num_symbols]
+        return oaconvolve(signal, matched)[delay * self.sps::self.sps][:num_symbols]
@@ -0,0 +1,104 @@
+"""
+16-QAM link used by project 2.
+"""
+import numpy as np
+
+from .ber import Q
+from .channel import AWGNChannel
+from .mapping import SymbolMapper
+from .profiling import stage
+from .slicer import Slicer, shared_slicer
+
+# Natural-labelled 16-QAM: index = re + 4 * im, normalized by sqrt(10)
+QAM16 = SymbolMapper(16, kind='qam')
+
+
+def add_awgn_noise(signal, SNR_dB, rng=None):
+    """
+    Adds complex Gaussian noise to the signal based on the specified SNR.
+
+    Parameters:
+    - signal: The original (complex) signal.
+    - SNR_dB: The desired Signal-to-Noise Ratio in decibels (dB).
+    - rng: np.random.Generator used for the noise.
+
+    Returns:
+    - signal with added AWGN noise.
+    """
+    signal = np.array(signal, dtype=complex)
+    return AWGNChannel().add_noise(signal, SNR_dB, np.random.default_rng(rng))
+
+
+def modulate_16qam(symbols):
+    """
+    Maps symbol indices 0..15 to the unit-power 16-QAM constellation.
+    """
+    return QAM16.points[symbols]
+
+
+def demodulate_16qam(received):
+    """
+    Demodulates a received signal based on 16-QAM modulation scheme.
+
+    Parameters:
+    - received: The received noisy signal (complex).
+
+    Returns:
+    - Demodulated symbol indices.
+    """
+    return shared_slicer(16, kind='qam').detect(received)
+
+
+def demodulate_16qam_chunks(received, chunk_size=2**20):
+    """
+    Demodulates a long (e.g. memory-mapped) 16-QAM stream chunk by chunk.
+
+    Every chunk is a view of ``received``; detection runs in a reused scratch buffer.
+
+    Parameters:
+    - received: 1-D received signal, such as digcom.capture.IQCapture.samples.
+    - chunk_size: Number of samples per chunk.
+
+    Yields:
+    - Demodulated symbol indices of every chunk, in a buffer that is reused for the next chunk.
+    """
+    slicer = Slicer(QAM16)
+    detected = np.empty(min(chunk_size, len(received)), dtype=np.intp)
+    for start in range(0, len(received), chunk_size):
+        chunk = received[start:start + chunk_size]
+        yield slicer.detect(chunk, out=detected[:len(chunk)])
+
+
+def qam16_symbol_error_probability(snr_db):
+    """
+    Symbol error probability of qam16_trial: 1 - (1 - 3/2 Q(d / sigma))^2 with the half distance
+    d = 1/sqrt(10) and the channel's noise variance sigma^2 = 1 / (2 * SNR) per dimension.
+    """
+    axis_error = 1.5 * Q(np.sqrt(2 * 10 ** (np.asarray(snr_db) / 10) / 10))
+    # Expanded form of 1 - (1 - p)^2: no cancellation, so the tail does not round to 0
+    return 2 * axis_error - axis_error ** 2
+
+
+def qam16_trial(num_symbols, snr_db, rng, channel=None):
+    """
+    Simulates one chunk of 16-QAM symbols over an AWGN channel.
+
+    The channel defaults to AWGNChannel(signal_power=1), the power of the
+    normalized constellation.
+
+    Returns:
+    - (number of symbol errors, number of symbols).
+    """
+    channel = channel if channel is not None else AWGNChannel(signal_power=1)
+    with stage('source', num_symbols):
+        symbols = rng.integers(0, 16, num_symbols)
+    with stage('modulate', num_symbols):
+        signal = channel.cast(QAM16.points)[symbols]
+    with stage('channel', num_symbols):
+        noisy_signal = channel.add_noise(signal, snr_db, rng)
+    with stage('detect', num_symbols):
+        slicer = shared_slicer(16, kind='qam')
+        detected = slicer.detect(noisy_signal, out=slicer.buffer(noisy_signal.shape))
+    with stage('count', num_symbols):
+        num_errors = np.count_nonzero(symbols != detected)
+    return num_errors, num_symbols
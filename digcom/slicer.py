@@ -0,0 +1,136 @@
+"""
+Hard-decision slicer for M-PAM, square M-QAM and M-PSK.
+
+Detection is arithmetic rather than a comparison against every threshold:
+each axis is scaled, offset, rounded and clipped to its level index in
+place in a reused scratch buffer, and the result is written into an
+integer output array. The cost per sample does not depend on M. Bits
+(Gray or natural) come from the mapper's label table. Trial functions get
+their slicer from shared_slicer(), so the tables and buffers are built
+once per thread rather than on every chunk.
+"""
+import threading
+
+import numpy as np
+
+from .mapping import SymbolMapper
+
+# Slicers handed out by shared_slicer, per thread since a Slicer keeps scratch buffers
+_shared = threading.local()
+
+
+class Slicer:
+    """
+    Nearest-point detector for the constellation of a SymbolMapper.
+
+    A Slicer reuses its scratch buffer between calls, so use one instance per thread.
+
+    Parameters:
+    - mapper: digcom.mapping.SymbolMapper describing the constellation.
+    - amplitude: Scale of the PAM levels (A in project 1); ignored for QAM and PSK.
+    """
+
+    def __init__(self, mapper, amplitude=1):
+        self.mapper = mapper
+        M = mapper.modOrder
+        if mapper.kind == 'qam':
+            self.levels = int(round(np.sqrt(M)))
+            step = 2 / np.sqrt(2 * (M - 1) / 3)  # distance between neighbouring levels
+        elif mapper.kind == 'pam':
+            self.levels = M
+            step = 2 * amplitude
+        else:
+            self.levels = M
+            step = 2 * np.pi / M  # angle between neighbouring points
+        # level index = round(x * scale + offset), clipped to [0, levels - 1]
+        self.scale = 1 / step
+        self.offset = (self.levels - 1) / 2 if mapper.kind != 'psk' else 0.0
+        self._scratch = np.empty(0)
+        self._out = np.empty(0, dtype=np.intp)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_scratch'] = np.empty(0)
+        state['_out'] = np.empty(0, dtype=np.intp)
+        return state
+
+    def buffer(self, shape):
+        """
+        Returns a reused integer array of the given shape for ``detect(..., out=...)``.
+
+        The array is only valid until the next call, so use it for results that are consumed right away.
+        """
+        size = int(np.prod(shape))
+        if self._out.size < size:
+            self._out = np.empty(size, dtype=np.intp)
+        return self._out[:size].reshape(shape)
+
+    def _axis(self, values, out, weight):
+        # out (+)= weight * clip(round(values * scale + offset)), with a single scratch buffer
+        if self._scratch.dtype != values.dtype or self._scratch.size < values.size:
+            self._scratch = np.empty(values.size, dtype=values.dtype)
+        scratch = self._scratch[:values.size].reshape(values.shape)
+        np.multiply(values, values.dtype.type(self.scale), out=scratch)
+        if self.offset:
+            scratch += values.dtype.type(self.offset)
+        np.rint(scratch, out=scratch)
+        if self.mapper.kind == 'psk':
+            np.remainder(scratch, self.levels, out=scratch)
+        else:
+            np.clip(scratch, 0, self.levels - 1, out=scratch)
+        if weight == 1:
+            out[...] = scratch
+        else:
+            scratch *= weight
+            np.add(out, scratch, out=out, casting='unsafe')
+
+    def detect(self, received, out=None):
+        """
+        Returns the constellation position of the nearest point for every received sample.
+
+        Parameters:
+        - received: Received samples (real for PAM, complex for QAM/PSK), any shape.
+        - out: Optional preallocated integer array of the same shape.
+
+        Returns:
+        - Integer array of constellation positions.
+        """
+        received = np.asarray(received)
+        if out is None:
+            out = np.empty(received.shape, dtype=np.intp)
+        kind = self.mapper.kind
+        if kind == 'pam':
+            self._axis(np.real(received), out, 1)
+        elif kind == 'qam':
+            self._axis(received.real, out, 1)
+            self._axis(received.imag, out, self.levels)
+        else:
+            self._axis(np.angle(received), out, 1)
+        return out
+
+    def detect_labels(self, received, out=None):
+        """
+        Returns the detected bit labels (Gray or natural, as configured in the mapper).
+        """
+        return self.mapper.label_of[self.detect(received, out)]
+
+    def detect_bits(self, received, out=None):
+        """
+        Returns the detected bits as a flat uint8 array (MSB first per symbol).
+        """
+        return self.mapper.positions_to_bits(self.detect(received, out))
+
+
+def shared_slicer(modOrder, kind='qam', amplitude=1):
+    """
+    Returns a Slicer for a natural-labelled constellation that is reused by later calls from the same thread.
+
+    Trial functions call this once per chunk, so the mapper tables, the scratch buffer and the
+    buffer() output are built once instead of on every chunk.
+    """
+    slicers = _shared.__dict__.setdefault('slicers', {})
+    key = (modOrder, kind, amplitude)
+    slicer = slicers.get(key)
+    if slicer is None:
+        slicer = slicers[key] = Slicer(SymbolMapper(modOrder, kind=kind), amplitude=amplitude)
+    return slicer
@@ -0,0 +1,89 @@
+"""
+Parallel SNR sweeps over a process pool.
+
+Every (SNR point, repetition) pair is an independent task with its own
+generator spawned from one np.random.SeedSequence, and the repetitions are
+merged in a fixed order. The result therefore depends only on the seed,
+never on the number of workers. When a digcom.profiling.Profiler is
+active, the stage timings of every worker are merged into it.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from . import profiling
+from .ber import BERPoint, simulate_ber
+
+
+def _run_task(task):
+    trial, snr_db, seed_seq, kwargs = task
+    return simulate_ber(trial, snr_db, rng=np.random.default_rng(seed_seq), **kwargs)
+
+
+def _run_profiled_task(task, track_memory):
+    # Profiles a task in a worker process; the parent merges the returned stages
+    with profiling.Profiler(track_memory) as profiler:
+        point = _run_task(task)
+    return point, profiler
+
+
+def _pool_context():
+    # fork avoids re-running the (unguarded) project scripts in every worker
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def run_tasks(tasks, workers=None):
+    """
+    Runs (trial, snr_db, seed_seq, kwargs) simulate_ber tasks, in a process pool if workers > 1.
+
+    Returns:
+    - List of BERPoint in task order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        return [_run_task(task) for task in tasks]
+    profiler = profiling.active()
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=_pool_context()) as pool:
+        if profiler is None:
+            return list(pool.map(_run_task, tasks))
+        results = list(pool.map(partial(_run_profiled_task, track_memory=profiler.track_memory), tasks))
+    for _, worker_profiler in results:
+        profiler.merge(worker_profiler)
+    return [point for point, _ in results]
+
+
+def parallel_sweep(trial, snr_db_range, num_trials=1, seed=None, workers=None, **kwargs):
+    """
+    Runs simulate_ber for every SNR point and repetition across CPU cores.
+
+    Parameters:
+    - trial: Picklable trial function (module-level function or functools.partial of one).
+    - snr_db_range: Iterable of SNR values in dB.
+    - num_trials: Number of independent repetitions per SNR point; their counts are summed.
+    - seed: Seed (int, SeedSequence or None) from which every task's generator is spawned.
+    - workers: Number of worker processes; defaults to os.cpu_count(). 1 runs in-process.
+    - kwargs: Stopping parameters forwarded to simulate_ber (applied per repetition).
+
+    Returns:
+    - List of BERPoint, one per SNR value.
+    """
+    snr_db_range = [float(snr_db) for snr_db in snr_db_range]
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    children = seed_seq.spawn(len(snr_db_range) * num_trials)
+    tasks = [(trial, snr_db, children[i * num_trials + j], kwargs)
+             for i, snr_db in enumerate(snr_db_range) for j in range(num_trials)]
+
+    results = run_tasks(tasks, workers)
+
+    points = []
+    for i, snr_db in enumerate(snr_db_range):
+        point = BERPoint(snr_db)
+        for result in results[i * num_trials:(i + 1) * num_trials]:
+            point.merge(result)
+        points.append(point)
+    return points